@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import fields
+from typing import Iterable, List, Optional
+
+from pydantic_core import to_jsonable_python
+
+from .graph_components.state import BlogState
+
+# The BlogState fields kept for a finished blog; everything else in the final
+# state (thread IDs, timings, artifact IDs) describes the run rather than the blog.
+STORED_FIELDS = tuple(
+    field.name for field in fields(BlogState) if not field.name.endswith("_ref")
+)
+
+
+def _hash(payload) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def blog_id(title: str, blog_structure: str, source_urls: Iterable[str]) -> str:
+    """
+    The content address of a blog: a hash of its normalized title, the blog
+    structure it was planned against and the set of sources it was written from.
+    """
+    return _hash(
+        {
+            "title": " ".join(title.lower().split()),
+            "blog_structure": blog_structure,
+            "sources": sorted(set(source_urls)),
+        }
+    )[:32]
+
+
+class BlogStore:
+    """
+    Keeps finished blogs in SQLite, addressed by blog_id().
+
+    Each blog is stored as the JSON of its final BlogState together with an ETag
+    (a hash of that JSON), so reads hand the stored bytes out as they are and
+    conditional requests are answered without reading the blog at all.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blogs (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                state TEXT NOT NULL,
+                thread_id TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS blogs_updated_at ON blogs (updated_at DESC)"
+        )
+        self._conn.commit()
+
+    def put(self, state: dict, blog_structure: str) -> dict:
+        """
+        Stores the final state of a run and returns its "id" and "etag".
+
+        A blog with the same title, structure and sources replaces the stored one.
+        """
+        blog = {key: state.get(key) for key in STORED_FIELDS}
+        document = json.dumps(to_jsonable_python(blog), sort_keys=True)
+        etag = hashlib.sha256(document.encode("utf-8")).hexdigest()[:32]
+        key = blog_id(
+            blog["title"],
+            blog_structure,
+            (source["url"] for source in blog["sources"] or [] if "url" in source),
+        )
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO blogs (id, title, etag, state, thread_id, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title, etag = excluded.etag, state = excluded.state,
+                    thread_id = excluded.thread_id, updated_at = excluded.updated_at
+                """,
+                (key, blog["title"], etag, document, state.get("thread_id"), now, now),
+            )
+            self._conn.commit()
+        return {"id": key, "etag": etag}
+
+    def etag(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT etag FROM blogs WHERE id = ?", (key,)).fetchone()
+        return row["etag"] if row else None
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the stored row, with the blog still serialized under "state"."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM blogs WHERE id = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, title: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[dict]:
+        """Summaries of the stored blogs, most recently updated first."""
+        query, params = "SELECT id, title, etag, thread_id, created_at, updated_at FROM blogs", []
+        if title:
+            query += " WHERE title = ? COLLATE NOCASE"
+            params.append(title)
+        query += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+
+def build_blog_store() -> Optional[BlogStore]:
+    """
+    Builds the blog store on the SQLite file named by BLOG_STORE_PATH; an empty
+    value disables storing finished blogs.
+    """
+    path = os.environ.get(
+        "BLOG_STORE_PATH",
+        os.path.join(tempfile.gettempdir(), "inkflow_blogs.sqlite"),
+    )
+    return BlogStore(path) if path else None
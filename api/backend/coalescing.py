@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .graph_components.cache import LRUCache
+from .graph_components.singleflight import SingleFlight
+from .graph_components.state import BlogState
+
+
+def request_key(blog: BlogState, config: Optional[dict] = None) -> str:
+    """
+    Hashes a generation request on its normalized title, its seed sections and its
+    configurable settings, so requests that would produce the same blog share a key.
+    """
+    payload = {
+        "title": " ".join(blog.title.lower().split()),
+        "finalized_sections": [section.model_dump() for section in blog.finalized_sections],
+        "configurable": (config or {}).get("configurable", {}),
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class Broadcast:
+    """
+    Runs one event stream and replays it to every subscriber.
+
+    Subscribers that attach late first receive every event emitted so far. The
+    stream is cancelled once its last subscriber leaves before it has finished.
+    """
+
+    def __init__(self, events: AsyncIterator[dict]):
+        self.events: List[dict] = []
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._subscribers = 0
+        self._changed = asyncio.Condition()
+        self.task = asyncio.create_task(self._pump(events))
+
+    async def _pump(self, events: AsyncIterator[dict]) -> None:
+        try:
+            async for event in events:
+                async with self._changed:
+                    self.events.append(event)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[dict]:
+        """Yields every event of the stream, then raises its error if it failed."""
+        self._subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.events) or self.done)
+                while index < len(self.events):
+                    yield self.events[index]
+                    index += 1
+                if self.done and index == len(self.events):
+                    break
+            if self.error is not None:
+                raise self.error
+        finally:
+            self._subscribers -= 1
+            if not self._subscribers and not self.done:
+                self.task.cancel()
+
+
+class Coalescer:
+    """
+    De-duplicates identical generation requests at the server layer.
+
+    Requests that share a key while a generation is running attach to it and get
+    its result (or its stream) instead of starting their own graph run. Results
+    that finished less than ``window`` seconds ago are served again as they are.
+
+    Parameters
+    ----------
+    window : float
+        Seconds a finished result is reused for. 0 or less only joins running generations.
+    max_entries : int
+        The number of recent results kept.
+    """
+
+    def __init__(self, window: float = 0, max_entries: int = 128):
+        self.window = window
+        self.recent = LRUCache(max_entries=max_entries, ttl=window) if window > 0 else None
+        self.in_flight = SingleFlight()
+        self.streams: Dict[str, Broadcast] = {}
+        self.stats = {"started": 0, "joined": 0, "reused": 0}
+
+    async def run(self, key: str, work: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Returns a copy of the result of ``work``, shared with every concurrent caller of ``key``.
+
+        A caller that is cancelled, e.g. because its client disconnected, only stops
+        waiting; the run goes on for the others and is cancelled once all have left.
+        """
+        result = self.recent.get(key) if self.recent is not None else None
+        if result is not None:
+            self.stats["reused"] += 1
+            return dict(result)
+
+        async def start():
+            self.stats["started"] += 1
+            result = await work()
+            if self.recent is not None:
+                self.recent.set(key, result)
+            return result
+
+        if key in self.in_flight:
+            self.stats["joined"] += 1
+        return dict(await self.in_flight.do(key, start))
+
+    async def stream(self, key: str, start: Callable[[], AsyncIterator[dict]]) -> AsyncIterator[dict]:
+        """Yields the events of the stream for ``key``, starting it unless one is running or recent."""
+        stream_key = f"stream:{key}"
+        events = self.recent.get(stream_key) if self.recent is not None else None
+        if events is not None:
+            self.stats["reused"] += 1
+            for event in events:
+                yield event
+            return
+
+        broadcast = self.streams.get(key)
+        if broadcast is None:
+            self.stats["started"] += 1
+            broadcast = self.streams[key] = Broadcast(start())
+            broadcast.task.add_done_callback(lambda _: self._finish_stream(key, broadcast))
+        else:
+            self.stats["joined"] += 1
+        async for event in broadcast.subscribe():
+            yield event
+
+    def _finish_stream(self, key: str, broadcast: Broadcast) -> None:
+        if self.streams.get(key) is broadcast:
+            del self.streams[key]
+        if self.recent is not None and broadcast.error is None and not broadcast.task.cancelled():
+            # Token deltas are only useful live; the node events already carry each
+            # finished section, so replays skip them.
+            self.recent.set(
+                f"stream:{key}",
+                [event for event in broadcast.events if event.get("event") != "token"],
+            )
+
+
+def build_coalescer() -> Coalescer:
+    """
+    Builds the coalescer from COALESCE_WINDOW, the seconds a finished blog is served
+    again to identical requests (0, the default, only joins running generations), and
+    COALESCE_CACHE_SIZE, the number of recent blogs kept.
+    """
+    return Coalescer(
+        window=float(os.environ.get("COALESCE_WINDOW", 0)),
+        max_entries=int(os.environ.get("COALESCE_CACHE_SIZE", 128)),
+    )
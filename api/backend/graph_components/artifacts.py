@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from .cache import LRUCache, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+def run_id(config: Optional[dict]) -> str:
+    """The run a graph step belongs to: its thread ID, or "default" outside a thread."""
+    return ((config or {}).get("configurable") or {}).get("thread_id") or "default"
+
+
+class ArtifactStore:
+    """
+    Keeps the large, immutable artifacts of a run (search results, passages, the
+    formatted main-body outline) once, so graph state and Sends carry short IDs
+    instead of copies that are serialized at every step.
+
+    Artifacts are content-addressed, so identical values share one entry. Each run
+    pins what it stores until ``release``; released artifacts stay in a small LRU
+    tier for follow-up reads. With ``open``, every artifact is also written to
+    SQLite, so resumed and regenerated runs find them after a restart.
+
+    Writes are batched: ``put`` queues the artifact and one worker-thread ``flush``
+    commits everything queued meanwhile, so nodes never wait on the disk. Rows
+    expire ``ttl`` seconds after they were last stored and the table keeps at most
+    ``max_entries`` of them, so a finished run can be regenerated until then.
+
+    Parameters
+    ----------
+    recent_entries : int
+        The number of released artifacts kept in memory.
+    """
+
+    def __init__(self, recent_entries: int = 64):
+        self._lock = threading.Lock()
+        self._pinned: Dict[str, Any] = {}
+        self._refs: Dict[str, int] = defaultdict(int)
+        self._runs: Dict[str, Set[str]] = defaultdict(set)
+        self._recent = LRUCache(max_entries=recent_entries)
+        self._conn: Optional[sqlite3.Connection] = None
+        self.path: Optional[str] = None
+        self._db_lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._flush_scheduled = False
+        self.ttl = 0.0
+        self.max_entries = 0
+
+    def open(self, path: str, ttl: float = 7 * 24 * 60 * 60, max_entries: int = 10_000) -> None:
+        """
+        Persists artifacts to the SQLite file at ``path``.
+
+        ``ttl`` is the row lifetime in seconds and ``max_entries`` the number of rows
+        kept, the most recently stored first; 0 or less disables either limit.
+        """
+        conn = connect_sqlite(path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artifacts (
+                id TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(artifacts)")}
+        if "stored_at" not in columns:
+            # Tables written before rows expired; their rows count as stored now.
+            conn.execute("ALTER TABLE artifacts ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+            conn.execute("UPDATE artifacts SET stored_at = ?", (time.time(),))
+        conn.execute("CREATE INDEX IF NOT EXISTS artifacts_stored_at ON artifacts (stored_at)")
+        conn.commit()
+        with self._db_lock, self._lock:
+            self._conn = conn
+            self.path = path
+            self.ttl = ttl
+            self.max_entries = max_entries
+
+    def put(self, run: str, value: Any) -> str:
+        """Stores ``value`` for ``run`` and returns its ID."""
+        document = json.dumps(value, sort_keys=True, default=str)
+        ref = "a" + hashlib.sha1(document.encode("utf-8")).hexdigest()[:24]
+        with self._lock:
+            if ref not in self._runs[run]:
+                self._runs[run].add(ref)
+                self._refs[ref] += 1
+                self._pinned.setdefault(ref, value)
+            if self._conn is None:
+                return ref
+            self._pending[ref] = document
+            if self._flush_scheduled:
+                return ref
+            self._flush_scheduled = True
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self.flush)
+        except RuntimeError:
+            # Outside the event loop, e.g. a sync node running in a worker thread.
+            self.flush()
+        return ref
+
+    def flush(self) -> None:
+        """
+        Writes the queued artifacts in one transaction and prunes expired rows.
+
+        A batch that fails to write, e.g. while the checkpointer holds the database
+        locked for longer than SQLITE_TIMEOUT, is queued again for the next flush and
+        logged; its artifacts stay readable meanwhile.
+        """
+        with self._db_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._flush_scheduled = False
+            if not batch or self._conn is None:
+                return
+            now = time.time()
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO artifacts (id, value, stored_at) VALUES (?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET stored_at = excluded.stored_at
+                    """,
+                    [(ref, document, now) for ref, document in batch.items()],
+                )
+                if self.ttl > 0:
+                    self._conn.execute("DELETE FROM artifacts WHERE stored_at < ?", (now - self.ttl,))
+                if self.max_entries > 0:
+                    self._conn.execute(
+                        """
+                        DELETE FROM artifacts WHERE id IN (
+                            SELECT id FROM artifacts ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                        )
+                        """,
+                        (self.max_entries,),
+                    )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                logger.exception(
+                    "Writing %d artifacts to %s failed; they stay queued.", len(batch), self.path
+                )
+
+    def get(self, ref: Optional[str], default: Any = None) -> Any:
+        """
+        Returns the artifact ``ref`` points to; ``default`` when ``ref`` is None.
+
+        Callers share the stored value and must not mutate it.
+
+        Raises:
+        - KeyError: If the artifact was released and is no longer stored anywhere.
+        """
+        if ref is None:
+            return default
+        with self._lock:
+            if ref in self._pinned:
+                return self._pinned[ref]
+            document = self._pending.get(ref)
+        if document is not None:
+            return json.loads(document)
+        value = self._recent.get(ref)
+        if value is not None:
+            return value
+        with self._db_lock:
+            row = (
+                self._conn.execute("SELECT value FROM artifacts WHERE id = ?", (ref,)).fetchone()
+                if self._conn is not None
+                else None
+            )
+        if row is None:
+            raise KeyError(ref)
+        value = json.loads(row[0])
+        self._recent.set(ref, value)
+        return value
+
+    def release(self, run: str) -> None:
+        """Unpins everything ``run`` stored; artifacts no other run holds move to the LRU tier."""
+        with self._lock:
+            for ref in self._runs.pop(run, ()):
+                self._refs[ref] -= 1
+                if self._refs[ref] <= 0:
+                    del self._refs[ref]
+                    self._recent.set(ref, self._pinned.pop(ref))
+
+    def __len__(self) -> int:
+        return len(self._pinned)
+
+
+artifacts = ArtifactStore()
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a connection waits for another connection's write lock before failing
+# with "database is locked".
+SQLITE_TIMEOUT = float(os.environ.get("SQLITE_TIMEOUT", 30))
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite file that other connections write to as well, e.g. the checkpoint
+    file shared by the checkpointer, the job ledger and the artifact store.
+
+    WAL lets readers go on while one connection writes, and writers wait up to
+    SQLITE_TIMEOUT seconds for each other instead of failing right away.
+    """
+    conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class LRUCache:
+    """
+    An in-process cache with least-recently-used eviction and per-entry expiry.
+
+    Parameters
+    ----------
+    max_entries : int
+        The number of entries kept before the least recently used one is evicted.
+    ttl : float
+        Seconds an entry stays valid. 0 or less keeps entries until evicted.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl if self.ttl > 0 else 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    An on-disk cache of JSON-serializable values stored in a single SQLite table.
+
+    Writes never block the caller on the disk: ``set`` queues the entry, and one
+    ``flush`` in a worker thread (inline outside the event loop) commits everything
+    queued meanwhile. Reads do not write either: their access times are kept in
+    memory and written with the next flush. Expired and least recently used rows
+    are pruned at most every ``prune_interval`` seconds.
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database file. ":memory:" keeps the table in memory.
+    ttl : float
+        Seconds an entry stays valid. 0 or less keeps entries until evicted.
+    max_entries : int
+        The number of rows kept; the least recently used rows are pruned past it.
+    touch_batch : int
+        The number of access times kept in memory before a flush writes them.
+    prune_interval : float
+        Seconds between two prunes of the table.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 0,
+        max_entries: int = 10_000,
+        touch_batch: int = 64,
+        prune_interval: float = 60,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending: Dict[str, Tuple[str, float, float]] = {}
+        self._touched: Dict[str, float] = {}
+        self._flush_scheduled = False
+        self._pruned_at = 0.0
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            value, expires_at, _ = pending
+        else:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+        if expires_at and expires_at < now:
+            # Expired rows are left for the next prune.
+            return None
+        with self._lock:
+            if key not in self._pending:
+                self._touched[key] = now
+            flush = len(self._touched) >= self.touch_batch and self._schedule_flush()
+        if flush:
+            self._flush_soon()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl > 0 else 0
+        document = json.dumps(value)
+        with self._lock:
+            self._pending[key] = (document, expires_at, now)
+            self._touched.pop(key, None)
+            flush = self._schedule_flush()
+        if flush:
+            self._flush_soon()
+
+    def _schedule_flush(self) -> bool:
+        """Marks a flush as scheduled; False when one already is. Called with the lock held."""
+        if self._flush_scheduled:
+            return False
+        self._flush_scheduled = True
+        return True
+
+    def _flush_soon(self) -> None:
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self.flush)
+        except RuntimeError:
+            # Outside the event loop, e.g. in a worker thread.
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the queued entries and access times in one transaction.
+
+        A batch that fails to write, e.g. while another connection holds the
+        database locked, is queued again and logged.
+        """
+        with self._db_lock:
+            with self._lock:
+                entries, self._pending = self._pending, {}
+                touched, self._touched = self._touched, {}
+                self._flush_scheduled = False
+            if not entries and not touched:
+                return
+            now = time.time()
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                    [(key, *entry) for key, entry in entries.items()],
+                )
+                self._conn.executemany(
+                    "UPDATE cache SET used_at = ? WHERE key = ?",
+                    [(used_at, key) for key, used_at in touched.items()],
+                )
+                if now - self._pruned_at >= self.prune_interval:
+                    self._prune(now)
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                with self._lock:
+                    # Entries queued meanwhile are newer and win.
+                    self._pending = {**entries, **self._pending}
+                    self._touched = {**touched, **self._touched}
+                logger.exception(
+                    "Writing %d cache entries to %s failed; they stay queued.", len(entries), self.path
+                )
+
+    def _prune(self, now: float) -> None:
+        self._conn.execute("DELETE FROM cache WHERE expires_at > 0 AND expires_at < ?", (now,))
+        self._conn.execute(
+            """
+            DELETE FROM cache WHERE key IN (
+                SELECT key FROM cache ORDER BY used_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+        self._pruned_at = now
+
+    def clear(self) -> None:
+        with self._db_lock:
+            with self._lock:
+                self._pending.clear()
+                self._touched.clear()
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+
+class TieredCache:
+    """
+    Looks entries up in a fast in-process tier first and falls back to a persistent tier.
+
+    Hits on the persistent tier are promoted into the in-process tier. Hit and miss
+    counts are kept per tier so callers can expose them.
+
+    Parameters
+    ----------
+    memory : LRUCache
+        The in-process tier.
+    disk : Optional[SQLiteCache]
+        The persistent tier, or None to keep entries in memory only.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.stats["disk_hits"] += 1
+                self.memory.set(key, value)
+                return value
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
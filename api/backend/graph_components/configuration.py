@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass, fields
-from typing import Any, Optional
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Optional
 
 from langchain_core.runnables import RunnableConfig
 
@@ -29,10 +29,71 @@ The blog post should follow this strict three-part structure:
    
 """
 
+# "staged" writes the introduction and conclusion after every main-body section is
+# done; "overlap" drafts them from the planned outline in parallel with the main bodies.
+SCHEDULING_MODES = ("staged", "overlap")
+
+
+def parse_node_map(value: str, field_name: str) -> Dict[str, str]:
+    """
+    Parses a per-node setting written as comma-separated "node=value" pairs.
+
+    Raises:
+    - ValueError: If an entry is not a "node=value" pair.
+    """
+    mapping = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        node, separator, setting = entry.partition("=")
+        if not separator or not node.strip() or not setting.strip():
+            raise ValueError(f"Malformed {field_name} entry {entry.strip()!r}, expected node=value.")
+        mapping[node.strip()] = setting.strip()
+    return mapping
+
 
 @dataclass
 class Configuration:
     blog_structure: str = DEFAULT_BLOG_STRUCTURE
+    # "read_write", "replay" (serve LLM calls only from the cache), "refresh" or "off".
+    # A value set for one call (e.g. "refresh" to regenerate a section) wins over
+    # LLM_CACHE_MODE, which only sets the default.
+    llm_cache_mode: str = field(default="read_write", metadata={"call_overrides_env": True})
+    # Comma-separated graph nodes whose LLM calls always bypass the cache.
+    llm_cache_skip_nodes: str = ""
+    # Number of search results kept by the curator.
+    curated_sources: int = 2
+    # Ranking-score gap below which the curator asks the LLM to break a tie.
+    curation_tiebreak_margin: float = 0.05
+    # Maximum tokens kept from each curated source before it is chunked into passages.
+    source_token_budget: int = 800
+    # Number of passages handed to each section writer.
+    section_passages: int = 4
+    # One of SCHEDULING_MODES.
+    scheduling_mode: str = "staged"
+    # Number of search queries run concurrently for a title (the title plus local rewrites).
+    search_queries: int = 3
+    # Seconds the search stage waits for its queries; those still running are then cancelled.
+    search_deadline: float = 6.0
+    # Search proceeds without the remaining queries once this many distinct sources
+    # scoring at least search_min_score have arrived.
+    search_min_sources: int = 6
+    search_min_score: float = 0.5
+    # Prompt token budget of every LLM call; sources, then other long inputs, are trimmed to fit.
+    prompt_token_budget: int = 8000
+    # Per-node overrides of prompt_token_budget as comma-separated "node=tokens" pairs,
+    # e.g. "write_main=4000".
+    prompt_token_budgets: str = ""
+    # Azure deployments per graph node as comma-separated "node=deployment" pairs, e.g.
+    # "curate=gpt-4o-mini,write_not_main=gpt-4o-mini"; other nodes use the default deployment.
+    llm_routes: str = ""
+    # Deployment that takes over a call that timed out or was rate limited; empty disables fallback.
+    llm_fallback_deployment: str = ""
+    # Seconds an LLM call may take before it is abandoned for the fallback; 0 waits indefinitely.
+    llm_timeout: float = 0
+    # Seconds after which a still-running call is hedged with the same call to the fallback
+    # deployment, taking whichever answers first; 0 disables hedging.
+    llm_hedge_after: float = 0
 
     @classmethod
     def from_runnable_config(
@@ -44,7 +105,8 @@ class Configuration:
         This method reads configuration values from the provided RunnableConfig,
         environment variables, and default values. If a value is not provided in the
         RunnableConfig, it checks the environment variables. If neither is available,
-        it uses the default value for the field.
+        it uses the default value for the field. Environment variables win over the
+        RunnableConfig, except for fields marked ``call_overrides_env``.
 
         Parameters:
         - config (Optional[RunnableConfig]): The RunnableConfig instance to read configuration values from.
@@ -68,11 +130,20 @@ class Configuration:
                 env_value = os.environ.get(field.name.upper())
                 configurable_value = configurable.get(field.name)
 
-                if env_value is not None:
+                if configurable_value is not None and field.metadata.get("call_overrides_env"):
+                    values[field.name] = configurable_value
+                elif env_value is not None:
+                    # Environment variables are strings; coerce them for numeric fields.
+                    if field.type in (int, float):
+                        env_value = field.type(env_value)
                     values[field.name] = env_value
                 elif configurable_value is not None:
                     values[field.name] = configurable_value
                 else:
                     values[field.name] = field.default
 
+        if values["scheduling_mode"] not in SCHEDULING_MODES:
+            raise ValueError(
+                f"Unknown scheduling_mode {values['scheduling_mode']!r}, expected one of {SCHEDULING_MODES}."
+            )
         return cls(**values)
@@ -0,0 +1,159 @@
+import asyncio
+import importlib.util
+import os
+import random
+from typing import Dict, Optional
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Failures where the request never reached the server, or a pooled connection was
+# closed under us, so sending it again is safe.
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: a random delay up to ``base * 2**attempt``."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Retries connection failures and retryable status codes with jittered backoff.
+
+    A ``Retry-After`` header, when present, sets the delay instead (up to ``cap``).
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, retries: int, base: float, cap: float):
+        self.transport = transport
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            delay = None
+            try:
+                response = await self.transport.handle_async_request(request)
+            except RETRY_ERRORS:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                delay = _retry_after(response)
+                await response.aclose()
+            await asyncio.sleep(
+                min(delay, self.cap) if delay is not None else backoff(attempt, self.base, self.cap)
+            )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HTTPClients:
+    """
+    Process-wide pooled HTTP clients, one per upstream service.
+
+    Every client for the same service name shares one connection pool, so TLS
+    handshakes are paid once and keep-alive connections are reused across requests.
+
+    Parameters
+    ----------
+    max_connections : int
+        The maximum number of open connections per service.
+    max_keepalive : int
+        The number of idle connections kept open per service.
+    keepalive_expiry : float
+        Seconds an idle connection is kept before it is closed.
+    timeout : float
+        Read, write and pool timeout in seconds.
+    connect_timeout : float
+        Connect timeout in seconds.
+    retries : int
+        Retries for retryable failures. Clients built with ``retry=True`` retry in
+        the transport; the OpenAI SDK is given the same count and retries itself.
+    backoff_base, backoff_cap : float
+        The first backoff window and the longest delay, in seconds.
+    http2 : bool
+        Negotiate HTTP/2 where the server supports it. Needs the ``h2`` package.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 50,
+        keepalive_expiry: float = 60,
+        timeout: float = 120,
+        connect_timeout: float = 5,
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._sync: Dict[str, httpx.Client] = {}
+        self._async: Dict[str, httpx.AsyncClient] = {}
+
+    def sync_client(self, name: str) -> httpx.Client:
+        client = self._sync.get(name)
+        if client is None or client.is_closed:
+            client = self._sync[name] = httpx.Client(
+                limits=self.limits, timeout=self.timeout, http2=self.http2
+            )
+        return client
+
+    def async_client(self, name: str, retry: bool = False) -> httpx.AsyncClient:
+        client = self._async.get(name)
+        if client is None or client.is_closed:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            if retry:
+                transport = RetryTransport(transport, self.retries, self.backoff_base, self.backoff_cap)
+            client = self._async[name] = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._sync.values():
+            client.close()
+        for client in self._async.values():
+            await client.aclose()
+        self._sync.clear()
+        self._async.clear()
+
+
+def build_http_clients() -> HTTPClients:
+    """
+    Builds the client factory from HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY, HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_RETRIES,
+    HTTP_BACKOFF_BASE, HTTP_BACKOFF_CAP and HTTP2 ("0" disables HTTP/2).
+    """
+    return HTTPClients(
+        max_connections=int(os.environ.get("HTTP_MAX_CONNECTIONS", 100)),
+        max_keepalive=int(os.environ.get("HTTP_MAX_KEEPALIVE", 50)),
+        keepalive_expiry=float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 60)),
+        timeout=float(os.environ.get("HTTP_TIMEOUT", 120)),
+        connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5)),
+        retries=int(os.environ.get("HTTP_RETRIES", 2)),
+        backoff_base=float(os.environ.get("HTTP_BACKOFF_BASE", 0.5)),
+        backoff_cap=float(os.environ.get("HTTP_BACKOFF_CAP", 8)),
+        http2=os.environ.get("HTTP2", "1") != "0",
+    )
+
+
+http_clients = build_http_clients()
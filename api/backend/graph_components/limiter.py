@@ -0,0 +1,145 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+
+from .metrics import REGISTRY, Gauge, Histogram
+
+# Lower values are served first: calls from requests that are further along the
+# pipeline jump the queue so nearly finished blogs are not starved by new ones.
+NODE_PRIORITY = {
+    "write_not_main": 0,
+    "write_main": 1,
+    "plan": 2,
+    "curate": 3,
+}
+
+queue_depth = REGISTRY.register(
+    Gauge("inkflow_llm_queue_depth", "LLM calls waiting for a concurrency slot.")
+)
+in_flight = REGISTRY.register(
+    Gauge("inkflow_llm_in_flight", "LLM calls currently holding a concurrency slot.")
+)
+queue_wait = REGISTRY.register(
+    Histogram(
+        "inkflow_llm_queue_wait_seconds",
+        "Time LLM calls spent waiting for a slot and a rate-limit token.",
+        ["node"],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+class LLMLimiter:
+    """
+    A process-wide gate in front of every LLM call.
+
+    It bounds the number of concurrent calls, meters call starts with a token
+    bucket, and hands free slots to the waiting call with the best priority (see
+    NODE_PRIORITY). A call that fails with HTTP 429 pauses new starts for
+    ``cooldown`` seconds so the whole process backs off together.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        The maximum number of LLM calls in flight at once.
+    rate : float
+        Call starts allowed per second. 0 disables rate limiting.
+    burst : int
+        The token bucket capacity.
+    cooldown : float
+        Seconds to pause new calls after a 429 response.
+    """
+
+    def __init__(self, max_concurrency: int = 8, rate: float = 0, burst: int = 1, cooldown: float = 2):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.cooldown = cooldown
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, node: str):
+        """Holds a concurrency slot (and a rate-limit token) for the duration of the block."""
+        started = time.perf_counter()
+        await self._acquire(NODE_PRIORITY.get(node, len(NODE_PRIORITY)))
+        try:
+            await self._take_token()
+            queue_wait.observe(time.perf_counter() - started, node=node)
+            yield
+        except Exception as e:
+            if is_rate_limited(e):
+                self._paused_until = time.monotonic() + self.cooldown
+            raise
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            in_flight.set(self._in_flight)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        queue_depth.inc()
+        try:
+            # _release hands its slot straight to us, so _in_flight is already counted.
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            queue_depth.dec()
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+        in_flight.set(self._in_flight)
+
+    async def _take_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def build_llm_limiter() -> LLMLimiter:
+    """
+    Builds the limiter from LLM_MAX_CONCURRENCY, LLM_RATE_PER_SECOND, LLM_BURST and
+    LLM_RATE_LIMIT_COOLDOWN.
+    """
+    return LLMLimiter(
+        max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 8)),
+        rate=float(os.environ.get("LLM_RATE_PER_SECOND", 0)),
+        burst=int(os.environ.get("LLM_BURST", 1)),
+        cooldown=float(os.environ.get("LLM_RATE_LIMIT_COOLDOWN", 2)),
+    )
+
+
+llm_limiter = build_llm_limiter()
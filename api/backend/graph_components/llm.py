@@ -1,11 +1,51 @@
+import functools
 import os
-from langchain_openai import AzureChatOpenAI
+from typing import TYPE_CHECKING
 
+from .http_clients import http_clients
 
-deployment_name = os.environ.get("AZURE_OPENAI_DEPLOYMENT")
-api_version = os.environ.get("AZURE_API_VERSION")
+if TYPE_CHECKING:
+    from langchain_openai import AzureChatOpenAI
 
-llm = AzureChatOpenAI(
-    azure_deployment=deployment_name,
-    api_version=api_version,
-)
+
+def build_chat_model(**overrides) -> "AzureChatOpenAI":
+    """
+    Builds an AzureChatOpenAI client on the shared, pooled Azure HTTP clients.
+
+    Every model built here reuses the same keep-alive connections; ``overrides``
+    are passed to AzureChatOpenAI (e.g. a different ``max_retries``).
+
+    Raises:
+        EnvironmentError: If Azure OpenAI deployment details are missing in the environment variables.
+    """
+    # Imported here: langchain_openai pulls in the whole openai SDK, which dominates start-up.
+    from langchain_openai import AzureChatOpenAI
+
+    deployment_name = os.environ.get("AZURE_OPENAI_DEPLOYMENT")
+    api_version = os.environ.get("AZURE_API_VERSION")
+    if not deployment_name or not api_version:
+        raise EnvironmentError("Azure OpenAI deployment details are missing.")
+
+    params = dict(
+        azure_deployment=deployment_name,
+        api_version=api_version,
+        # Report token usage on streamed calls too, so the metrics see every completion.
+        stream_usage=True,
+        max_retries=http_clients.retries,
+        http_client=http_clients.sync_client("azure"),
+        http_async_client=http_clients.async_client("azure"),
+    )
+    params.update(overrides)
+    return AzureChatOpenAI(**params)
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm() -> "AzureChatOpenAI":
+    """The chat model shared by the planner and writers, built on first use."""
+    return build_chat_model()
+
+
+@functools.lru_cache(maxsize=None)
+def get_deployment_llm(deployment: str) -> "AzureChatOpenAI":
+    """The chat model of a named Azure deployment, built on first use and shared by every route to it."""
+    return build_chat_model(azure_deployment=deployment)
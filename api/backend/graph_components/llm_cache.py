@@ -0,0 +1,147 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional, Sequence, Type, Union
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from pydantic import BaseModel
+
+from .cache import LRUCache, SQLiteCache, TieredCache
+from .configuration import Configuration
+from .routing import model_router
+
+CACHE_MODES = ("read_write", "replay", "refresh", "off")
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of chat completions.
+
+    Responses are keyed by a hash of the rendered messages plus the model
+    parameters, so identical prompts sent to the same deployment are answered
+    from the cache. The mode comes from ``Configuration.llm_cache_mode``:
+
+    - "read_write": serve hits and store fresh completions.
+    - "replay": serve only from the cache and raise LLMCacheMiss on a miss.
+    - "refresh": always call the model and overwrite the cached response.
+    - "off": always call the model.
+
+    Nodes listed in ``Configuration.llm_cache_skip_nodes`` always call the model.
+    """
+
+    def __init__(self, cache: Optional[TieredCache]):
+        self.cache = cache
+
+    @staticmethod
+    def key(
+        llm: BaseChatModel,
+        messages: Sequence[BaseMessage],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> str:
+        params = {**llm._identifying_params, **llm._get_ls_params()}
+        request = {
+            "messages": [[message.type, message.content] for message in messages],
+            "model": params,
+        }
+        if schema is not None:
+            request["schema"] = schema.model_json_schema()
+        payload = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def mode_for(node: str, configurable: Configuration) -> str:
+        skipped = {name.strip() for name in configurable.llm_cache_skip_nodes.split(",")}
+        if node in skipped:
+            return "off"
+        if configurable.llm_cache_mode not in CACHE_MODES:
+            raise ValueError(
+                f"Unknown llm_cache_mode {configurable.llm_cache_mode!r}, expected one of {CACHE_MODES}."
+            )
+        return configurable.llm_cache_mode
+
+    async def ainvoke(
+        self,
+        llm: BaseChatModel,
+        messages: Union[str, Sequence[BaseMessage]],
+        node: str,
+        configurable: Configuration,
+        metadata: Optional[dict] = None,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> BaseMessage:
+        """
+        Answers a chat call from the cache, falling back to ``llm.ainvoke``.
+
+        Parameters:
+        - llm (BaseChatModel): The model to call on a miss, unless ``node`` is routed to
+          another deployment (see ModelRouter).
+        - messages (Union[str, Sequence[BaseMessage]]): The rendered prompt.
+        - node (str): The graph node making the call, used for per-node opt-out.
+        - configurable (Configuration): The run configuration holding the cache mode.
+        - metadata (Optional[dict]): Run metadata forwarded to the model call.
+        - schema (Optional[Type[BaseModel]]): Forces the reply into a strict call of a tool
+          with this schema, so it comes back as arguments instead of free text.
+
+        Returns:
+        - BaseMessage: The cached or freshly generated response.
+
+        Raises:
+        - LLMCacheMiss: In replay mode, when the prompt has not been cached.
+        """
+        if isinstance(messages, str):
+            messages = [HumanMessage(content=messages)]
+        # Keyed by the deployment the node is routed to; a fallback's answer is stored
+        # under the same key, since it answers the same prompt.
+        llm = model_router.model_for(node, configurable, llm)
+
+        mode = self.mode_for(node, configurable) if self.cache is not None else "off"
+        key = self.key(llm, messages, schema) if mode != "off" else None
+
+        if key is not None and mode != "refresh":
+            cached = self.cache.get(key)
+            if cached is not None:
+                return messages_from_dict([cached])[0]
+            if mode == "replay":
+                raise LLMCacheMiss(f"No cached response for the {node} prompt {key}.")
+
+        response = await model_router.ainvoke(llm, messages, node, configurable, metadata, schema)
+        if key is not None:
+            self.cache.set(key, message_to_dict(response))
+        return response
+
+
+def build_llm_cache() -> LLMResponseCache:
+    """
+    Builds the response cache from environment variables.
+
+    LLM_CACHE_SIZE bounds the in-process tier, LLM_CACHE_DISK_SIZE the number of
+    rows in the SQLite tier, LLM_CACHE_TTL the entry lifetime in seconds (0 keeps
+    entries until evicted) and LLM_CACHE_PATH the SQLite file (an empty value keeps
+    the cache in memory only).
+    """
+    ttl = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+    size = int(os.environ.get("LLM_CACHE_SIZE", 512))
+    disk_size = int(os.environ.get("LLM_CACHE_DISK_SIZE", 10_000))
+    path = os.environ.get(
+        "LLM_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "inkflow_llm_cache.sqlite"),
+    )
+    disk = SQLiteCache(path, ttl=ttl, max_entries=disk_size) if path else None
+    return LLMResponseCache(TieredCache(LRUCache(max_entries=size, ttl=ttl), disk))
+
+
+@functools.lru_cache(maxsize=None)
+def get_response_cache() -> LLMResponseCache:
+    """The response cache shared by every agent, built (and its SQLite file opened) on first use."""
+    return build_llm_cache()
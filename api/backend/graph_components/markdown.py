@@ -0,0 +1,58 @@
+from typing import Iterable, Iterator, List
+
+from .state import Section
+
+SECTION_SEPARATOR = "\n\n"
+# The fields of a generation result sent back when the caller asks for a slim response.
+SLIM_FIELDS = ("title", "finalized_blog", "thread_id", "blog_id", "etag", "timings")
+
+
+def section_key(section: Section) -> str:
+    """The stable ID of a section, or its name for sections planned before IDs existed."""
+    return section.id or section.name
+
+
+def iter_markdown(sections: Iterable[Section]) -> Iterator[str]:
+    """Yields the final markdown one written section at a time."""
+    first = True
+    for section in sections:
+        if section.content:
+            yield section.content if first else SECTION_SEPARATOR + section.content
+            first = False
+
+
+class MarkdownRenderer:
+    """
+    Renders the planned sections into the final markdown while they are being written.
+
+    Sections finish in any order; ``add`` returns the markdown that became ready,
+    i.e. every finished section directly following what was already emitted, so the
+    concatenated output equals the ``finalized_blog`` built by iter_markdown.
+    """
+
+    def __init__(self, sections: List[Section]):
+        self.order = [section_key(section) for section in sections]
+        self.contents = {}
+        self.emitted = 0
+        self.started = False
+
+    def add(self, section: Section) -> str:
+        self.contents[section_key(section)] = section.content
+        chunks = []
+        while self.emitted < len(self.order) and self.order[self.emitted] in self.contents:
+            content = self.contents[self.order[self.emitted]]
+            if content:
+                chunks.append(content if not self.started else SECTION_SEPARATOR + content)
+                self.started = True
+            self.emitted += 1
+        return "".join(chunks)
+
+
+def slim_result(result: dict) -> dict:
+    """The finished blog and its identifiers, without the sources, passages and drafts."""
+    slim = {key: result[key] for key in SLIM_FIELDS if key in result}
+    slim["sections"] = [
+        {"id": section.id, "name": section.name, "isMainBody": section.isMainBody}
+        for section in result.get("sections") or []
+    ]
+    return slim
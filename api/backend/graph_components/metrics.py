@@ -0,0 +1,278 @@
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """A monotonically increasing value per label set, rendered in Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    """A value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative bucket counts, a sum and a count per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+node_duration = REGISTRY.register(
+    Histogram("inkflow_node_duration_seconds", "Time spent in each graph node.", ["node"])
+)
+llm_duration = REGISTRY.register(
+    Histogram("inkflow_llm_call_duration_seconds", "Latency of LLM calls by graph node.", ["node"])
+)
+llm_tokens = REGISTRY.register(
+    Counter("inkflow_llm_tokens_total", "LLM tokens by graph node and kind (prompt or completion).", ["node", "kind"])
+)
+llm_route_duration = REGISTRY.register(
+    Histogram("inkflow_llm_route_duration_seconds", "Latency of LLM calls by graph node and Azure deployment.", ["node", "deployment"])
+)
+llm_route_calls = REGISTRY.register(
+    Counter("inkflow_llm_route_calls_total", "LLM calls by graph node, Azure deployment and outcome (ok, timeout, rate_limited, error or cancelled).", ["node", "deployment", "outcome"])
+)
+llm_route_cost = REGISTRY.register(
+    Counter("inkflow_llm_route_cost_usd_total", "Estimated LLM spend in USD by graph node and Azure deployment, from LLM_PRICES.", ["node", "deployment"])
+)
+llm_fallbacks = REGISTRY.register(
+    Counter("inkflow_llm_fallbacks_total", "LLM calls sent to the fallback deployment by graph node and reason (timeout, rate_limited or hedge).", ["node", "reason"])
+)
+search_duration = REGISTRY.register(
+    Histogram("inkflow_search_duration_seconds", "Latency of Tavily search calls.")
+)
+cache_events = REGISTRY.register(
+    Gauge("inkflow_cache_events", "Cache hits and misses by cache and outcome.", ["cache", "outcome"])
+)
+blog_duration = REGISTRY.register(
+    Histogram("inkflow_blog_duration_seconds", "End-to-end blog generation time.", ["status"])
+)
+structured_outputs = REGISTRY.register(
+    Counter("inkflow_structured_outputs_total", "Structured LLM replies by graph node and outcome (parsed, repaired or failed).", ["node", "outcome"])
+)
+prompt_tokens = REGISTRY.register(
+    Counter("inkflow_prompt_tokens_total", "Prompt tokens by graph node and kind (static, dynamic or trimmed), counted locally before sending.", ["node", "kind"])
+)
+startup_duration = REGISTRY.register(
+    Gauge("inkflow_startup_seconds", "Time spent importing the server and warming up its clients.", ["phase"])
+)
+
+
+class RequestTimings:
+    """Collects the timing breakdown of a single generation request."""
+
+    def __init__(self):
+        self.nodes: List[dict] = []
+        self.llm_calls: List[dict] = []
+        self.searches: List[dict] = []
+
+    def as_dict(self) -> dict:
+        return {"nodes": self.nodes, "llm_calls": self.llm_calls, "searches": self.searches}
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "inkflow_request_timings", default=None
+)
+
+
+@contextmanager
+def track_request():
+    """Collects per-node and per-call timings for everything run inside the block."""
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_node(node: str, seconds: float) -> None:
+    node_duration.observe(seconds, node=node)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.nodes.append({"node": node, "seconds": round(seconds, 4)})
+
+
+def record_llm_call(
+    node: str,
+    seconds: float,
+    usage: Optional[dict],
+    deployment: str = "default",
+    cost: float = 0.0,
+) -> None:
+    usage = usage or {}
+    prompt_tokens = usage.get("input_tokens", 0)
+    completion_tokens = usage.get("output_tokens", 0)
+    llm_duration.observe(seconds, node=node)
+    llm_tokens.inc(prompt_tokens, node=node, kind="prompt")
+    llm_tokens.inc(completion_tokens, node=node, kind="completion")
+    llm_route_duration.observe(seconds, node=node, deployment=deployment)
+    llm_route_calls.inc(node=node, deployment=deployment, outcome="ok")
+    llm_route_cost.inc(cost, node=node, deployment=deployment)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.llm_calls.append(
+            {
+                "node": node,
+                "deployment": deployment,
+                "seconds": round(seconds, 4),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": round(cost, 6),
+            }
+        )
+
+
+def record_llm_failure(node: str, deployment: str, outcome: str) -> None:
+    llm_route_calls.inc(node=node, deployment=deployment, outcome=outcome)
+
+
+def record_fallback(node: str, reason: str) -> None:
+    llm_fallbacks.inc(node=node, reason=reason)
+
+
+def record_search(query: str, seconds: float) -> None:
+    search_duration.observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.searches.append({"query": query, "seconds": round(seconds, 4)})
+
+
+def record_structured_output(node: str, outcome: str) -> None:
+    structured_outputs.inc(node=node, outcome=outcome)
+
+
+def record_prompt(node: str, static: int, dynamic: int, trimmed: int) -> None:
+    prompt_tokens.inc(static, node=node, kind="static")
+    prompt_tokens.inc(dynamic, node=node, kind="dynamic")
+    prompt_tokens.inc(trimmed, node=node, kind="trimmed")
+
+
+def record_cache_stats(cache: str, stats: Dict[str, int]) -> None:
+    for outcome, value in stats.items():
+        cache_events.set(value, cache=cache, outcome=outcome)
+
+
+def timed_node(node: str, fn):
+    """Wraps a graph node so its wall time is recorded under ``node``."""
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                record_node(node, time.perf_counter() - started)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record_node(node, time.perf_counter() - started)
+
+    return wrapper
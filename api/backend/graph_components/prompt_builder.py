@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import math
+import string
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from .configuration import Configuration, parse_node_map
+from .metrics import record_prompt
+from .sources import CHARS_PER_TOKEN, approx_tokens
+
+logger = logging.getLogger(__name__)
+
+# The tiktoken encoding of the GPT-4o family; counts stay close enough for older models.
+TOKENIZER_ENCODING = "o200k_base"
+TRUNCATION_MARK = "\n[...]"
+# Seconds before a tokenizer that failed to load, e.g. on a download error, is tried again.
+TOKENIZER_RETRY_SECONDS = 60.0
+
+_tokenizer_lock = threading.Lock()
+_tokenizer = None
+# When loading last failed or started; None before the first attempt.
+_tokenizer_tried_at = None
+
+
+def load_encoding():
+    """
+    Loads the tokenizer, downloading its vocabulary the first time; None when that fails.
+
+    This blocks, so the supervisor calls it during warm-up, off the event loop.
+    """
+    global _tokenizer, _tokenizer_tried_at
+    with _tokenizer_lock:
+        if _tokenizer is not None:
+            return _tokenizer
+        _tokenizer_tried_at = time.monotonic()
+        try:
+            import tiktoken
+
+            _tokenizer = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            logger.warning(
+                "Counting prompt tokens approximately, the %s tokenizer failed to load: %s",
+                TOKENIZER_ENCODING,
+                e,
+            )
+        return _tokenizer
+
+
+def _encoding():
+    """
+    The loaded tokenizer, or None while it is unavailable.
+
+    A tokenizer that is not loaded yet is loaded here, in a worker thread when the
+    event loop is running; a failed load is retried after TOKENIZER_RETRY_SECONDS.
+    """
+    global _tokenizer_tried_at
+    if _tokenizer is not None:
+        return _tokenizer
+    if _tokenizer_tried_at is not None and time.monotonic() - _tokenizer_tried_at < TOKENIZER_RETRY_SECONDS:
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return load_encoding()
+    _tokenizer_tried_at = time.monotonic()
+    loop.run_in_executor(None, load_encoding)
+    return None
+
+
+def count_tokens(text: str) -> int:
+    """Counts the tokens of ``text`` with tiktoken, falling back to the chars-per-token estimate."""
+    encoding = _encoding()
+    if encoding is None:
+        return approx_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    """The first ``tokens`` tokens of ``text``."""
+    encoding = _encoding()
+    if encoding is None:
+        return text[: max(tokens, 0) * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[: max(tokens, 0)])
+
+
+class PromptTemplate:
+    """
+    A ``str.format`` template parsed once, when the prompts module is imported.
+
+    Formatting joins the precompiled literal segments with the values instead of
+    re-parsing the template on every call, and the tokens of the literal text are
+    counted only once.
+
+    ``prefix`` is the literal text before the first placeholder. It is the same on
+    every call, so the templates keep their fixed instructions there, where the
+    provider's prompt cache can serve them.
+
+    Raises:
+    - ValueError: If a placeholder uses a format spec, a conversion or an attribute lookup.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._segments = []
+        for literal, name, spec, conversion in string.Formatter().parse(template):
+            if spec or conversion or (name is not None and not name.isidentifier()):
+                raise ValueError(f"Unsupported placeholder {{{name}}} in a prompt template.")
+            self._segments.append((literal, name))
+        # How often each placeholder appears, e.g. an image URL used twice.
+        self.fields = Counter(name for _, name in self._segments if name is not None)
+        self.prefix = self._segments[0][0] if self._segments else ""
+        self._static_tokens: Optional[int] = None
+
+    @property
+    def static_tokens(self) -> int:
+        if self._static_tokens is not None:
+            return self._static_tokens
+        tokens = count_tokens("".join(literal for literal, _ in self._segments))
+        # An estimate made before the tokenizer loaded is not kept.
+        if _encoding() is not None:
+            self._static_tokens = tokens
+        return tokens
+
+    def format(self, **values) -> str:
+        """
+        Raises:
+        - KeyError: If a placeholder has no value.
+        """
+        parts = []
+        for literal, name in self._segments:
+            parts.append(literal)
+            if name is not None:
+                parts.append(str(values[name]))
+        return "".join(parts)
+
+
+@dataclass
+class Trimmable:
+    """
+    A prompt value the builder may shorten to fit a token budget.
+
+    ``parts`` are ordered most important first (e.g. passages by relevance); they
+    are dropped from the end down to ``keep``, and the last one kept is then cut.
+    """
+
+    parts: List[str]
+    separator: str = "\n\n"
+    keep: int = 1
+    tokens: List[int] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        self.tokens = [count_tokens(part) for part in self.parts]
+
+    def __str__(self) -> str:
+        return self.separator.join(self.parts)
+
+    def trim(self, excess: int) -> int:
+        """Shortens the value by up to ``excess`` tokens and returns the tokens saved."""
+        saved = 0
+        while saved < excess and len(self.parts) > self.keep:
+            self.parts.pop()
+            saved += self.tokens.pop()
+        if saved < excess and self.parts:
+            room = self.tokens[-1] - (excess - saved) - count_tokens(TRUNCATION_MARK)
+            cut = truncate_tokens(self.parts[-1], room) + TRUNCATION_MARK
+            cut_tokens = count_tokens(cut)
+            saved += self.tokens[-1] - cut_tokens
+            self.parts[-1], self.tokens[-1] = cut, cut_tokens
+        return saved
+
+
+def budget_for(node: str, configurable: Configuration) -> int:
+    """
+    The prompt token budget of ``node``: its entry in ``prompt_token_budgets``
+    ("node=tokens" pairs, comma-separated), else ``prompt_token_budget``.
+
+    Raises:
+    - ValueError: If ``prompt_token_budgets`` has a malformed entry.
+    """
+    budgets = parse_node_map(configurable.prompt_token_budgets, "prompt_token_budgets")
+    if node not in budgets:
+        return configurable.prompt_token_budget
+    if not budgets[node].isdigit():
+        raise ValueError(f"Malformed prompt_token_budgets entry for {node!r}, expected a token count.")
+    return int(budgets[node])
+
+
+def build_prompt(
+    template: PromptTemplate,
+    node: str,
+    budget: Optional[int],
+    trim_order: Sequence[str] = (),
+    **values,
+) -> str:
+    """
+    Formats ``template`` so the prompt fits in ``budget`` tokens.
+
+    While the prompt is over budget, the values named in ``trim_order`` (which must
+    be Trimmable) are shortened in that order, each as far as its ``keep`` allows.
+    A prompt that still does not fit is sent as it is; the metrics count its tokens
+    and what was trimmed for ``node``.
+    """
+    dynamic = sum(
+        (sum(value.tokens) if isinstance(value, Trimmable) else count_tokens(str(value)))
+        * template.fields[name]
+        for name, value in values.items()
+        if name in template.fields
+    )
+    excess = template.static_tokens + dynamic - budget if budget else 0
+    trimmed = 0
+    for name in trim_order:
+        if excess <= 0:
+            break
+        repeats = template.fields[name]
+        saved = values[name].trim(math.ceil(excess / repeats)) * repeats
+        excess -= saved
+        trimmed += saved
+
+    record_prompt(node, template.static_tokens, dynamic - trimmed, trimmed)
+    return template.format(**values)
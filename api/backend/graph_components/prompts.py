@@ -1,50 +1,42 @@
+from .prompt_builder import PromptTemplate
+
 # Blog Planner Instructions
 blogPlannerInstructions = """
 You are an expert technical writer, helping to plan a blog post.
 
-Your goal is to generate a CONCISE outline, structured as follows:
-
-First, carefully reflect on these notes from the user about the scope of the blog post:
-{userInstructions}
-
-Next, structure these notes into a set of sections that follow the structure EXACTLY as shown below:
-{blogStructure}
+Your goal is to generate a CONCISE outline. First, carefully reflect on the notes from the user about the scope of the blog post. Next, structure these notes into a set of sections that follow the blog structure EXACTLY.
 
 For each section, please provide:
 - Name: Clear and descriptive section name.
 - Description: A brief overview of the main topics and concepts to be covered in this section. If code examples should be included, mention that as well. Also, include the word count estimate.
-- Image: Provide a relevant image for the section. Refer to {images} for image options.
+- Image: Provide a relevant image for the section, chosen from the image options below.
 - Content: Leave this blank for now. The content should be filled in later with markdown format.
 - Main Body: Specify whether this is a main body section or an introduction/conclusion section.
 
 Final check:
-1. Confirm that the sections follow the structure EXACTLY as shown above.
+1. Confirm that the sections follow the blog structure EXACTLY.
 2. Confirm that each section description has a clearly stated scope that does not conflict with other sections.
 3. Confirm that the sections are grounded in the user notes.
-4. Ensure that images from {images} are appropriately assigned to each section.
-5. Cross-check the sources from {sources} and ensure relevant points from them are integrated into the sections.
-"""
-
-
-# Main Body Section Writer Instructions
-# Main Body Section Writer Instructions
-mainBodySectionWriterInstructions = """
-You are an expert technical writer crafting one section of a blog post.
+4. Ensure that images from the image options are appropriately assigned to each section.
+5. Cross-check the sources and ensure relevant points from them are integrated into the sections.
 
-Here are the user instructions for the overall blog post, providing context for the narrative:
-{title}
+Blog structure:
+{blogStructure}
 
-Here is the Section Name you are going to write:
-{sectionName}
+Notes from the user about the scope of the blog post:
+{userInstructions}
 
-Here is the Section Description you are going to write:
-{sectionDescription}
+Image options:
+{images}
 
-Use the following sources to develop the section content:
+Sources:
 {sources}
+"""
 
-Incorporate the following image where relevant:
-{imageUrl}
+
+# Main Body Section Writer Instructions
+mainBodySectionWriterInstructions = """
+You are an expert technical writer crafting one section of a blog post.
 
 WRITING GUIDELINES:
 
@@ -59,7 +51,6 @@ WRITING GUIDELINES:
   * ``` for code blocks
   * ** for emphasis when needed
   * - for bullet points if necessary
-  * ![Alt text]({imageUrl}) for the image
 - Do not include introductory phrases like 'Here is a draft...' or 'Here is a section...'
 
 3. Grounding:
@@ -73,30 +64,28 @@ QUALITY CHECKLIST:
 [ ] Appropriately incorporates the provided image.
 [ ] Uses proper Markdown formatting.
 
-Generate the section content now, focusing on clarity and technical accuracy.
-"""
-
-# Introduction and Conclusion Section Writer Instructions
-introConclusionInstructions = """
-You are an expert technical writer crafting the introduction or conclusion of a blog post.
-
 Here are the user instructions for the overall blog post, providing context for the narrative:
 {title}
 
-Here is the section name you are going to write:
+Here is the Section Name you are going to write:
 {sectionName}
 
-Here is the section description you are going to write:
+Here is the Section Description you are going to write:
 {sectionDescription}
 
-Here are the main body sections that you are going to reference:
-{mainBodySections}
+Incorporate the following image where relevant:
+{imageUrl}
+Embed it in Markdown as ![Alt text]({imageUrl}).
 
 Use the following sources to develop the section content:
 {sources}
 
-Incorporate the following image where relevant:
-{imageUrl}
+Generate the section content now, focusing on clarity and technical accuracy.
+"""
+
+# Introduction and Conclusion Section Writer Instructions
+introConclusionInstructions = """
+You are an expert technical writer crafting the introduction or conclusion of a blog post.
 
 WRITING GUIDELINES:
 
@@ -114,4 +103,29 @@ FOR INTRODUCTION:
 FOR CONCLUSION:
 - Use Markdown formatting:
   * ## Conclusion (concise concluding statement)
+
+Here are the user instructions for the overall blog post, providing context for the narrative:
+{title}
+
+Here is the section name you are going to write:
+{sectionName}
+
+Here is the section description you are going to write:
+{sectionDescription}
+
+Incorporate the following image where relevant:
+{imageUrl}
+
+Here are the main body sections that you are going to reference:
+{mainBodySections}
+
+Use the following sources to develop the section content:
+{sources}
 """
+
+
+# The templates above, parsed once. Each keeps its fixed instructions ahead of the
+# first placeholder, so that shared prefix can be served from the provider's prompt cache.
+blogPlannerTemplate = PromptTemplate(blogPlannerInstructions)
+mainBodySectionWriterTemplate = PromptTemplate(mainBodySectionWriterInstructions)
+introConclusionTemplate = PromptTemplate(introConclusionInstructions)
@@ -0,0 +1,63 @@
+import re
+from typing import List
+
+STOPWORDS = frozenset(
+    """
+    about after all also and any are because been before being best between both but
+    can could did does doing during each few for from further guide had has have how
+    into its just more most new not now only other our out over own same should some
+    such than that the their them then there these they this those through too under
+    until very was way ways were what when where which while who why will with within
+    without would you your
+    """.split()
+)
+
+# Words, keeping the symbols of names like "C++", "C#" and "Node.js".
+_TERM = re.compile(r"[A-Za-z0-9][\w+#.]*")
+# Splits a title into its sub-topics: "A: B", "A - B", "A vs B", "A and B".
+_SUBTOPIC = re.compile(r"\s*(?::|\s[-–—|]\s|\bvs\.?\b|\bversus\b|\band\b|,)\s*", re.IGNORECASE)
+# Angles every blog of the default structure needs sources for.
+ANGLES = ("overview", "code examples", "best practices")
+
+
+def keywords(text: str, limit: int = 6) -> List[str]:
+    """
+    The distinct non-stopword terms of ``text``, lowercased, in order of appearance.
+
+    Short words are dropped unless they are acronyms such as "AI" or carry a digit or symbol.
+    """
+    seen: List[str] = []
+    for word in _TERM.findall(text):
+        word = word.rstrip(".")
+        term = word.lower()
+        if len(term) <= 2 and not (word.isupper() or not term.isalpha()):
+            continue
+        if term not in STOPWORDS and term not in seen:
+            seen.append(term)
+    return seen[:limit]
+
+
+def query_variants(title: str, count: int) -> List[str]:
+    """
+    Builds up to ``count`` distinct search queries for a blog title, without a model call.
+
+    The title itself comes first, then its keywords alone, then each sub-topic of a
+    compound title, then the keywords paired with the angles the blog has to cover.
+    """
+    terms = " ".join(keywords(title))
+    candidates = [title, terms]
+    # A sub-topic needs a real word to stand on its own, e.g. not just a version number.
+    parts = [
+        part for part in _SUBTOPIC.split(title) if any(term.isalpha() for term in keywords(part))
+    ]
+    if len(parts) > 1:
+        candidates.extend(" ".join(keywords(part)) for part in parts)
+    candidates.extend(f"{terms} {angle}" for angle in ANGLES if terms)
+
+    queries, seen = [], set()
+    for query in candidates:
+        normalized = " ".join(query.lower().split())
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            queries.append(query)
+    return queries[: max(count, 1)]
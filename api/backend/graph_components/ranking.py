@@ -0,0 +1,115 @@
+import math
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from .sources import tokenize
+
+# Additive credibility adjustments by domain suffix; the longest matching suffix wins.
+DOMAIN_WEIGHTS: Dict[str, float] = {
+    ".gov": 0.15,
+    ".edu": 0.15,
+    "nih.gov": 0.2,
+    "who.int": 0.2,
+    "nature.com": 0.15,
+    "arxiv.org": 0.15,
+    "acm.org": 0.15,
+    "ieee.org": 0.15,
+    "wikipedia.org": 0.1,
+    "britannica.com": 0.1,
+    "github.com": 0.1,
+    "docs.python.org": 0.15,
+    "developer.mozilla.org": 0.15,
+    "medium.com": -0.05,
+    "quora.com": -0.1,
+    "pinterest.com": -0.2,
+    "facebook.com": -0.15,
+}
+
+TAVILY_WEIGHT = 0.5
+RELEVANCE_WEIGHT = 0.4
+NEAR_DUPLICATE_SIMILARITY = 0.7
+
+
+def domain_weight(url: str) -> float:
+    host = (urlparse(url or "").hostname or "").lower()
+    best, weight = -1, 0.0
+    for suffix, value in DOMAIN_WEIGHTS.items():
+        # "example.com" matches the domain and its subdomains; ".gov" matches any host under it.
+        matches = host.endswith(suffix) if suffix.startswith(".") else (
+            host == suffix or host.endswith("." + suffix)
+        )
+        if matches and len(suffix) > best:
+            best, weight = len(suffix), value
+    return weight
+
+
+def bm25_scores(query: str, documents: List[List[str]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of every tokenized document against ``query``."""
+    if not documents:
+        return []
+    average_length = sum(len(document) for document in documents) / len(documents) or 1
+    frequency = Counter(term for document in documents for term in set(document))
+    terms = set(tokenize(query))
+    scores = []
+    for document in documents:
+        counts = Counter(document)
+        score = 0.0
+        for term in terms:
+            if not counts[term]:
+                continue
+            idf = math.log(1 + (len(documents) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+            tf = counts[term] * (k1 + 1)
+            score += idf * tf / (counts[term] + k1 * (1 - b + b * len(document) / average_length))
+        scores.append(score)
+    return scores
+
+
+def shingles(tokens: List[str], size: int = 5) -> set:
+    if len(tokens) < size:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def rank_sources(title: str, sources: List[dict]) -> List[Tuple[float, dict]]:
+    """
+    Ranks search results for a blog title without calling a model.
+
+    Each source scores a weighted sum of its Tavily ``score``, its BM25 relevance to
+    the title (normalized to the best match) and its domain credibility weight. Sources
+    whose URL repeats, or whose content nearly duplicates a better-ranked source, are
+    dropped.
+
+    Returns:
+    - List[Tuple[float, dict]]: (score, source) pairs, best first.
+    """
+    documents = [tokenize(f"{s.get('title', '')} {s.get('content', '')}") for s in sources]
+    relevance = bm25_scores(title, documents)
+    best_relevance = max(relevance, default=0) or 1
+
+    scored = [
+        (
+            TAVILY_WEIGHT * float(source.get("score") or 0)
+            + RELEVANCE_WEIGHT * relevance[index] / best_relevance
+            + domain_weight(source.get("url")),
+            index,
+        )
+        for index, source in enumerate(sources)
+    ]
+    scored.sort(key=lambda pair: (-pair[0], pair[1]))
+
+    ranked, kept_urls, kept_shingles = [], set(), []
+    for score, index in scored:
+        source = sources[index]
+        if source.get("url") in kept_urls:
+            continue
+        fingerprint = shingles(documents[index])
+        if fingerprint and any(
+            len(fingerprint & other) / len(fingerprint | other) >= NEAR_DUPLICATE_SIMILARITY
+            for other in kept_shingles
+        ):
+            continue
+        kept_urls.add(source.get("url"))
+        kept_shingles.append(fingerprint)
+        ranked.append((score, source))
+    return ranked
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import zlib
+from typing import List, Protocol
+
+import numpy as np
+
+from .cache import LRUCache
+from .sources import tokenize
+
+
+class Embedder(Protocol):
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns one L2-normalized row per text."""
+        ...
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """
+    Embeds text offline by hashing unigrams and bigrams into a fixed-size vector.
+
+    Uses signed feature hashing with sublinear term frequency, so similar wording
+    lands close together without any model download.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                vectors[row, digest % self.dimensions] += sign
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Embeds text with a local sentence-transformers model on the CPU."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        return _normalize(vectors.astype(np.float32))
+
+
+def build_embedder() -> Embedder:
+    """
+    Builds the embedder named by the EMBEDDER environment variable.
+
+    "hashing" (the default) needs no model; "sentence-transformers:<model>" loads a
+    local model and falls back to hashing when sentence-transformers is not installed.
+    """
+    name = os.environ.get("EMBEDDER", "hashing")
+    if name.startswith("sentence-transformers:"):
+        try:
+            return SentenceTransformerEmbedder(name.split(":", 1)[1])
+        except ImportError:
+            pass
+    return HashingEmbedder()
+
+
+class PassageIndex:
+    """An in-memory matrix of passage embeddings searched by cosine similarity."""
+
+    def __init__(self, passages: List[dict], embedder: Embedder):
+        self.passages = passages
+        self.embedder = embedder
+        self.vectors = embedder.embed([f"{p['title']} {p['text']}" for p in passages])
+
+    def search(self, query: str, k: int) -> List[dict]:
+        """Returns the ``k`` passages closest to ``query``, most similar first."""
+        if not self.passages or k <= 0:
+            return []
+        similarities = self.vectors @ self.embedder.embed([query])[0]
+        if k < len(self.passages):
+            top = np.sort(np.argpartition(-similarities, k - 1)[:k])
+        else:
+            top = np.arange(len(self.passages))
+        # Stable, so equally similar passages keep their original order.
+        return [self.passages[i] for i in top[np.argsort(-similarities[top], kind="stable")]]
+
+
+embedder = build_embedder()
+# Indexes are built once per set of passages and shared by every section of a run.
+_indexes = LRUCache(max_entries=int(os.environ.get("PASSAGE_INDEX_CACHE_SIZE", 64)))
+
+
+def passage_index(passages: List[dict]) -> PassageIndex:
+    key = hashlib.sha1(
+        "\x00".join(f"{p['id']}\x01{p['text']}" for p in passages).encode("utf-8")
+    ).hexdigest()
+    index = _indexes.get(key)
+    if index is None:
+        index = PassageIndex(passages, embedder)
+        _indexes.set(key, index)
+    return index
+
+
+def retrieve_passages(passages: List[dict], query: str, k: int) -> List[dict]:
+    """
+    Returns the ``k`` passages most similar to ``query`` (all of them when there are
+    fewer), most similar first, so prompt trimming drops the least relevant ones.
+    """
+    return passage_index(passages).search(query, k) if passages else []
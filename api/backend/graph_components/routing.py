@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Sequence, Set, Tuple, Type
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+from .configuration import Configuration, parse_node_map
+from .limiter import is_rate_limited, llm_limiter
+from .llm import get_deployment_llm
+from .metrics import record_fallback, record_llm_call, record_llm_failure
+
+
+def deployment_of(llm: BaseChatModel) -> str:
+    """The Azure deployment a model calls, or "default" for models that do not name one."""
+    return getattr(llm, "deployment_name", None) or "default"
+
+
+def _fallback_reason(error: BaseException) -> Optional[str]:
+    """Why a failed call may be retried on the fallback deployment; None when it may not."""
+    if is_rate_limited(error):
+        return "rate_limited"
+    # The openai SDK raises its own timeout error when the HTTP read times out.
+    if isinstance(error, TimeoutError) or type(error).__name__ == "APITimeoutError":
+        return "timeout"
+    return None
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # An attempt that lost the race may fail after nobody awaits it.
+    if not task.cancelled():
+        task.exception()
+
+
+def _outcome(error: BaseException) -> str:
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return _fallback_reason(error) or "error"
+
+
+class ModelRouter:
+    """
+    Picks the Azure deployment for each LLM call and fails over between deployments.
+
+    Each graph node can be routed to its own deployment (``Configuration.llm_routes``),
+    so light stages such as curation can run on a faster, cheaper model. A call
+    that times out (``llm_timeout``) or is rate limited is retried once on
+    ``llm_fallback_deployment``; with ``llm_hedge_after``, a call still running after
+    that many seconds is also sent to the fallback and the first answer wins.
+
+    Every attempt takes its own limiter slot and is counted per node and deployment,
+    with its estimated cost from ``prices``.
+
+    Parameters
+    ----------
+    prices : Dict[str, Tuple[float, float]]
+        USD per million prompt and completion tokens, by deployment.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.prices = prices or {}
+
+    def model_for(self, node: str, configurable: Configuration, default: BaseChatModel) -> BaseChatModel:
+        """The model ``node`` is routed to; ``default`` when it has no route."""
+        deployment = parse_node_map(configurable.llm_routes, "llm_routes").get(node)
+        if deployment is None or deployment == deployment_of(default):
+            return default
+        return get_deployment_llm(deployment)
+
+    def fallback_for(self, configurable: Configuration, llm: BaseChatModel) -> Optional[BaseChatModel]:
+        deployment = configurable.llm_fallback_deployment
+        if not deployment or deployment == deployment_of(llm):
+            return None
+        return get_deployment_llm(deployment)
+
+    def deployments(self, configurable: Configuration) -> Set[str]:
+        """The deployments ``configurable`` routes to besides the default one."""
+        routed = set(parse_node_map(configurable.llm_routes, "llm_routes").values())
+        return {deployment for deployment in (*routed, configurable.llm_fallback_deployment) if deployment}
+
+    def cost(self, deployment: str, usage: Optional[dict]) -> float:
+        prompt_price, completion_price = self.prices.get(deployment, (0.0, 0.0))
+        usage = usage or {}
+        return (
+            usage.get("input_tokens", 0) * prompt_price
+            + usage.get("output_tokens", 0) * completion_price
+        ) / 1_000_000
+
+    async def attempt(
+        self,
+        llm: BaseChatModel,
+        messages: Sequence[BaseMessage],
+        node: str,
+        configurable: Configuration,
+        metadata: Optional[dict] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        fallback: bool = False,
+    ) -> BaseMessage:
+        """Makes one call to ``llm`` within a limiter slot and records it."""
+        deployment = deployment_of(llm)
+        model = llm
+        if schema is not None:
+            model = llm.bind_tools(
+                [schema], tool_choice=schema.__name__, strict=True, parallel_tool_calls=False
+            )
+        # Tokens of a fallback attempt are marked, so the stream does not interleave two drafts.
+        config = {"metadata": {**(metadata or {}), "deployment": deployment, "fallback": fallback}}
+        async with llm_limiter.slot(node):
+            started = time.perf_counter()
+            try:
+                call = model.ainvoke(messages, config=config)
+                if configurable.llm_timeout > 0:
+                    response = await asyncio.wait_for(call, configurable.llm_timeout)
+                else:
+                    response = await call
+            except BaseException as e:
+                record_llm_failure(node, deployment, _outcome(e))
+                raise
+        usage = getattr(response, "usage_metadata", None)
+        record_llm_call(
+            node, time.perf_counter() - started, usage, deployment, self.cost(deployment, usage)
+        )
+        return response
+
+    async def ainvoke(
+        self,
+        llm: BaseChatModel,
+        messages: Sequence[BaseMessage],
+        node: str,
+        configurable: Configuration,
+        metadata: Optional[dict] = None,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> BaseMessage:
+        """
+        Calls ``llm``, failing over to the fallback deployment as configured.
+
+        Raises:
+        - Exception: The primary call's error when it may not fall back, or when the
+          fallback fails too.
+        """
+        fallback = self.fallback_for(configurable, llm)
+        if fallback is None:
+            return await self.attempt(llm, messages, node, configurable, metadata, schema)
+
+        primary = asyncio.ensure_future(
+            self.attempt(llm, messages, node, configurable, metadata, schema)
+        )
+        primary.add_done_callback(_retrieve)
+        tasks = [primary]
+        try:
+            if configurable.llm_hedge_after > 0:
+                done, _ = await asyncio.wait(tasks, timeout=configurable.llm_hedge_after)
+                if not done:
+                    record_fallback(node, "hedge")
+                    hedge = asyncio.ensure_future(
+                        self.attempt(fallback, messages, node, configurable, metadata, schema, True)
+                    )
+                    hedge.add_done_callback(_retrieve)
+                    tasks.append(hedge)
+                    return await self._first_answer(tasks)
+            try:
+                return await primary
+            except Exception as e:
+                reason = _fallback_reason(e)
+                if reason is None:
+                    raise
+                record_fallback(node, reason)
+            return await self.attempt(
+                fallback, messages, node, configurable, metadata, schema, True
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _first_answer(tasks: list) -> BaseMessage:
+        """The first successful result of ``tasks``; the first task's error if all fail."""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        return tasks[0].result()
+
+
+def build_model_router() -> ModelRouter:
+    """
+    Builds the router from LLM_PRICES: comma-separated "deployment=prompt:completion"
+    prices in USD per million tokens, e.g. "gpt-4o=2.5:10,gpt-4o-mini=0.15:0.6".
+
+    Raises:
+    - ValueError: If a price is not a "prompt:completion" pair of numbers.
+    """
+    prices = {}
+    for deployment, price in parse_node_map(os.environ.get("LLM_PRICES", ""), "LLM_PRICES").items():
+        prompt_price, separator, completion_price = price.partition(":")
+        if not separator:
+            raise ValueError(f"Malformed LLM_PRICES entry for {deployment!r}, expected prompt:completion.")
+        prices[deployment] = (float(prompt_price), float(completion_price))
+    return ModelRouter(prices)
+
+
+model_router = build_model_router()
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent calls that share a key.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same result (or exception) instead of starting their own.
+
+    The work runs in a task of its own rather than in the first caller's, so a
+    caller that is cancelled (e.g. a client that disconnected) only stops waiting.
+    The work itself is cancelled once every caller waiting on it has left.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Flight] = {}
+
+    async def do(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = self._in_flight[key] = _Flight(asyncio.ensure_future(work()))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody is left to use the result; later callers start afresh.
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def _finish(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        # Mark the exception as retrieved when nobody else was waiting on it.
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._in_flight
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
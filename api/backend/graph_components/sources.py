@@ -0,0 +1,88 @@
+import hashlib
+import math
+import re
+from typing import Iterable, List
+
+# A rough chars-per-token ratio for English prose; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+PASSAGE_TOKENS = 200
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def approx_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2]
+
+
+def content_hash(text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, chunk_tokens: int = PASSAGE_TOKENS) -> List[str]:
+    """Splits text into chunks of roughly ``chunk_tokens`` tokens on sentence boundaries."""
+    limit = chunk_tokens * CHARS_PER_TOKEN
+    chunks, current = [], ""
+    for sentence in _SENTENCE_END.split(" ".join(text.split())):
+        if current and len(current) + len(sentence) + 1 > limit:
+            chunks.append(current)
+            current = ""
+        # A single sentence longer than the limit is hard-wrapped.
+        while len(sentence) > limit:
+            chunks.append(sentence[:limit])
+            sentence = sentence[limit:]
+        current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def prepare_sources(sources: Iterable[dict], token_budget: int) -> List[dict]:
+    """
+    Turns raw search results into compact, de-duplicated passages.
+
+    Sources are de-duplicated by URL and by normalized content, reduced to their
+    title, URL and text (``raw_content`` when present, otherwise ``content``),
+    capped at ``token_budget`` tokens each and chunked into passages.
+
+    Parameters:
+    - sources (Iterable[dict]): Search results as returned by Tavily.
+    - token_budget (int): The maximum number of tokens kept per source.
+
+    Returns:
+    - List[dict]: Passages with ``id``, ``title``, ``url`` and ``text`` keys.
+    """
+    passages: List[dict] = []
+    seen_urls, seen_content = set(), set()
+    for source in sources:
+        url = source.get("url")
+        text = source.get("raw_content") or source.get("content") or ""
+        digest = content_hash(text)
+        if not text or url in seen_urls or digest in seen_content:
+            continue
+        seen_urls.add(url)
+        seen_content.add(digest)
+
+        text = " ".join(text.split())[: token_budget * CHARS_PER_TOKEN]
+        for chunk in chunk_text(text):
+            passages.append(
+                {
+                    "id": f"p{len(passages)}",
+                    "title": source.get("title", ""),
+                    "url": url,
+                    "text": chunk,
+                }
+            )
+    return passages
+
+
+def format_passages(passages: List[dict]) -> str:
+    """Renders passages as a compact, numbered block for prompts."""
+    return "\n\n".join(
+        f"[{p['id']}] {p['title']} ({p['url']})\n{p['text']}" for p in passages
+    )
@@ -1,7 +1,8 @@
 import operator
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from dataclasses import dataclass, field
-from typing import List, Annotated
+from typing import List, Annotated, Optional, Tuple
 
 class Section(BaseModel):
     name: str = Field(description="The name of the section of the blog.")
@@ -13,15 +14,22 @@ class Section(BaseModel):
     isMainBody: bool = Field(
         description="A boolean value indicating whether this section is the main body of the blog post.",
     )
+    # Assigned by the planner rather than the model, so it is left out of the tool schema.
+    id: SkipJsonSchema[Optional[str]] = Field(
+        default=None, description="A stable ID for the section, unique within the blog."
+    )
 
 class Sections(BaseModel):
     sections: List[Section] = Field(
         description="A list of sections that make up the blog post."
     )
-@dataclass
+# Inside the graph, sources, passages and the main-body outline live in the run's
+# ArtifactStore and the state only carries their IDs (the *_ref fields). The full
+# lists are filled in on results handed back to callers.
+@dataclass(slots=True)
 class BlogState:
     title: str
-    finalized_sections: Annotated[List[str], operator.add]  # Non-default field
+    finalized_sections: Annotated[List[Section], operator.add]  # Non-default field
     sources: List[dict] = field(
         default_factory=list,
         metadata={"description": "A list of URLs along with content representing the search results according to the title to be curated."},
@@ -30,6 +38,10 @@ class BlogState:
         default_factory=list, 
         metadata={"description": "A list of images to be included in the blog."},
     )
+    passages: List[dict] = field(
+        default_factory=list,
+        metadata={"description": "De-duplicated, budgeted passages prepared from the curated sources."},
+    )
     sections: List[Section] = field(
         default_factory=list,
         metadata={"description": "The sections that make up the blog post."},
@@ -42,6 +54,18 @@ class BlogState:
         default=None, 
         metadata={"description": "The finalized blog post."},
     )
+    sources_ref: Optional[str] = field(
+        default=None,
+        metadata={"description": "Artifact ID of the search results, then of the curated sources."},
+    )
+    passages_ref: Optional[str] = field(
+        default=None,
+        metadata={"description": "Artifact ID of the prepared passages."},
+    )
+    main_sections_ref: Optional[str] = field(
+        default=None,
+        metadata={"description": "Artifact ID of the formatted main-body sections."},
+    )
 
 
 class BlogStateInput(BaseModel):
@@ -50,28 +74,38 @@ class BlogStateInput(BaseModel):
 class BlogStateOutput(BaseModel):
     finalized_blog: str = Field(default=None, description="The finalized blog post.")
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SectionState:
     section: Section
     title: str
-    sources: List[dict] = field(
-        default_factory=list, 
-        metadata={"description": "Sources related to this section."},
-    )
-    image: str = field(
-        default=None, 
-        metadata={"description": "The image associated with this section."},
+    passages_ref: Optional[str] = field(
+        default=None,
+        metadata={"description": "Artifact ID of the run's passages."},
     )
-    main_sections: str = field(
-        default=None, 
-        metadata={"description": "Main sections of this section."},
+    passage_ids: Tuple[str, ...] = field(
+        default=(),
+        metadata={"description": "IDs of the passages relevant to this section."},
     )
-    finalized_sections: List[Section] = field(
-        default_factory=list, 
-        metadata={"description": "Finalized sections for the blog."},
+    main_sections_ref: Optional[str] = field(
+        default=None,
+        metadata={"description": "Artifact ID of the formatted main-body sections."},
     )
 
 class SectionOutputState(BaseModel):
     finalized_sections: Sections = Field(
         ..., description="The finalized sections of the blog post."
     )
+
+
+class RegenerateRequest(BaseModel):
+    section: str = Field(description="The name of the section to rewrite.")
+    blog: Optional[BlogState] = Field(
+        default=None, description="A previously generated blog state."
+    )
+    job_id: Optional[str] = Field(
+        default=None, description="The thread ID of a checkpointed run, used instead of blog."
+    )
+    refresh_dependents: bool = Field(
+        default=True,
+        description="Rewrite the introduction and conclusion when a main-body section they reference changes.",
+    )
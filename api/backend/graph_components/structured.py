@@ -0,0 +1,110 @@
+import json
+import re
+from typing import Any, Iterator, Tuple, Type, TypeVar
+
+import json5
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+from .metrics import record_structured_output
+
+Model = TypeVar("Model", bound=BaseModel)
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a reply cannot be read as the requested schema, even after repair."""
+
+
+def _close_truncated(text: str) -> str:
+    """Closes the strings, arrays and objects left open by a reply that was cut off."""
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "]}" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return text.rstrip().rstrip(",") + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parses JSON, repairing the usual near misses without another model call.
+
+    Code fences and prose around the value are dropped; trailing commas, single
+    quotes and comments are accepted; a truncated tail is closed. Returns the value
+    and whether any repair was needed.
+
+    Raises:
+    - ValueError: If the text holds no JSON value even after repair.
+    """
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        raise ValueError("The reply holds no JSON object or array.")
+    text = text[min(starts):]
+    try:
+        return json5.loads(text[: max(text.rfind("}"), text.rfind("]")) + 1]), True
+    except ValueError:
+        return json5.loads(_close_truncated(text)), True
+
+
+def _fit(value: Any, schema: Type[BaseModel]) -> Any:
+    """Wraps a bare list in the schema's only field, e.g. a list of sections into Sections."""
+    if isinstance(value, list) and len(schema.model_fields) == 1:
+        return {next(iter(schema.model_fields)): value}
+    return value
+
+
+def _payloads(response: BaseMessage, schema: Type[BaseModel]) -> Iterator[Any]:
+    for call in getattr(response, "tool_calls", None) or []:
+        if call["name"] == schema.__name__:
+            yield call["args"]
+    # Arguments the SDK could not parse as JSON, e.g. because the reply was cut off.
+    for call in getattr(response, "invalid_tool_calls", None) or []:
+        if call.get("args"):
+            yield call["args"]
+    if isinstance(response.content, str) and response.content.strip():
+        yield response.content
+
+
+def parse_structured(response: BaseMessage, schema: Type[Model], node: str) -> Model:
+    """
+    Reads a reply as ``schema``, from its tool call arguments or, failing that, its text.
+
+    Every attempt is counted in the structured-output metrics for ``node`` as
+    "parsed", "repaired" or "failed".
+
+    Raises:
+    - StructuredOutputError: If no part of the reply validates against ``schema``.
+    """
+    for payload in _payloads(response, schema):
+        try:
+            value, repaired = (payload, False) if isinstance(payload, dict) else repair_json(payload)
+            result = schema.model_validate(_fit(value, schema))
+        except ValueError:
+            continue
+        record_structured_output(node, "repaired" if repaired else "parsed")
+        return result
+    record_structured_output(node, "failed")
+    raise StructuredOutputError(f"The {node} reply does not match the {schema.__name__} schema.")
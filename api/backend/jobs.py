@@ -0,0 +1,280 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .graph_components.cache import connect_sqlite
+from .graph_components.state import BlogState
+
+
+class BatchRequest(BaseModel):
+    blogs: List[BlogState] = Field(description="The blogs to generate.")
+    concurrency: Optional[int] = Field(
+        default=None,
+        description="How many blogs of this batch run at once. Defaults to BATCH_CONCURRENCY.",
+    )
+
+
+def checkpoint_path() -> str:
+    """
+    The SQLite file holding graph checkpoints and the job ledger.
+
+    Read from CHECKPOINT_PATH; an empty value disables checkpointing.
+    """
+    return os.environ.get(
+        "CHECKPOINT_PATH",
+        os.path.join(tempfile.gettempdir(), "inkflow_checkpoints.sqlite"),
+    )
+
+
+class JobInProgress(RuntimeError):
+    """Raised when a run is started or resumed while it is already running."""
+
+
+class JobLedger:
+    """
+    Records every generation run by its graph thread ID.
+
+    The graph checkpoints themselves live in the checkpointer; the ledger only keeps
+    what is needed to find runs worth resuming: title, status and last error.
+
+    A run is claimed atomically before it starts, and each running row records the
+    ledger (``owner``) that claimed it, so two requests or two workers sharing the
+    database never run the same checkpoint thread at once.
+    """
+
+    def __init__(self, path: str):
+        self.owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                thread_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT
+            )
+            """
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            # Ledgers written before runs were claimed.
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._conn.commit()
+
+    def start(self, thread_id: str, title: str, attempt: bool = True) -> bool:
+        """
+        Claims ``thread_id`` for this ledger and marks it running; ``attempt`` counts
+        it as a new attempt at generating the blog.
+
+        Returns False, changing nothing, when the run is already running.
+        """
+        now = time.time()
+        with self._lock:
+            claimed = self._conn.execute(
+                """
+                INSERT INTO jobs (thread_id, title, status, attempts, created_at, updated_at, owner)
+                VALUES (?, ?, 'running', 1, ?, ?, ?)
+                ON CONFLICT(thread_id) DO UPDATE SET
+                    status = 'running', error = NULL, attempts = attempts + ?,
+                    updated_at = excluded.updated_at, owner = excluded.owner
+                WHERE jobs.status != 'running'
+                """,
+                (thread_id, title, now, now, self.owner, int(attempt)),
+            ).rowcount
+            self._conn.commit()
+        return claimed > 0
+
+    def take_over(self, thread_id: str, owner: str) -> bool:
+        """
+        Claims a run that is still marked running by ``owner``, a process that was
+        cut off ("" for rows written before runs had owners). Only one of several
+        workers taking over the same run succeeds.
+        """
+        with self._lock:
+            claimed = self._conn.execute(
+                """
+                UPDATE jobs SET owner = ?, attempts = attempts + 1, updated_at = ?
+                WHERE thread_id = ? AND status = 'running' AND COALESCE(owner, '') = ?
+                """,
+                (self.owner, time.time(), thread_id, owner),
+            ).rowcount
+            self._conn.commit()
+        return claimed > 0
+
+    def finish(self, thread_id: str) -> None:
+        self._set_status(thread_id, "done", None)
+
+    def fail(self, thread_id: str, error: str) -> None:
+        self._set_status(thread_id, "failed", error)
+
+    def restore(self, thread_id: str, job: dict) -> None:
+        """Puts back the status and error of ``job``, a row read before the run was claimed."""
+        self._set_status(thread_id, job["status"], job["error"])
+
+    def _set_status(self, thread_id: str, status: str, error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE thread_id = ?",
+                (status, error, time.time(), thread_id),
+            )
+            self._conn.commit()
+
+    def expire(self, before: float) -> List[str]:
+        """Deletes the rows of runs that stopped running before ``before`` and returns their thread IDs."""
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM jobs WHERE status != 'running' AND updated_at < ? RETURNING thread_id",
+                (before,),
+            ).fetchall()
+            self._conn.commit()
+        return [row["thread_id"] for row in expired]
+
+    def get(self, thread_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+
+@dataclass
+class BatchItem:
+    index: int
+    title: str
+    thread_id: Optional[str] = None
+    status: str = "queued"  # queued, running, done or failed
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def summary(self) -> dict:
+        return {
+            "index": self.index,
+            "title": self.title,
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "error": self.error,
+            "seconds": (
+                round(self.finished_at - self.started_at, 3)
+                if self.started_at and self.finished_at
+                else None
+            ),
+        }
+
+
+@dataclass
+class Job:
+    id: str
+    items: List[BatchItem]
+    created_at: float = field(default_factory=time.time)
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def status(self) -> str:
+        statuses = {item.status for item in self.items}
+        if statuses <= {"done", "failed"}:
+            return "done"
+        if statuses == {"queued"}:
+            return "queued"
+        return "running"
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "items": [item.summary() for item in self.items],
+        }
+
+
+class JobStore:
+    """
+    Keeps batch jobs in memory and runs them through the shared supervisor.
+
+    Only the most recent ``max_jobs`` jobs are kept; older ones are dropped once
+    they have finished.
+    """
+
+    def __init__(self, supervisor, max_jobs: int = None, concurrency: int = None):
+        self.supervisor = supervisor
+        self.max_jobs = max_jobs or int(os.environ.get("BATCH_HISTORY", 100))
+        self.concurrency = concurrency or int(os.environ.get("BATCH_CONCURRENCY", 4))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def submit(self, request: BatchRequest) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            items=[
+                BatchItem(index=index, title=blog.title)
+                for index, blog in enumerate(request.blogs)
+            ],
+        )
+        self._jobs[job.id] = job
+        self._evict()
+        job.task = asyncio.create_task(
+            self.run(job, request.blogs, request.concurrency or self.concurrency)
+        )
+        return job
+
+    async def run(self, job: Job, blogs: List[BlogState], concurrency: int) -> None:
+        """
+        Runs every blog of a job with at most ``concurrency`` in flight.
+
+        Each item succeeds or fails on its own; identical search queries across the
+        batch are collapsed by MrSearch, and repeated prompts by the LLM cache.
+        """
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def run_item(item: BatchItem, blog: BlogState):
+            async with semaphore:
+                item.status = "running"
+                item.started_at = time.time()
+                item.thread_id = uuid.uuid4().hex
+                try:
+                    item.result = await self.supervisor.arun(blog, thread_id=item.thread_id)
+                    item.status = "done"
+                except Exception as e:
+                    item.error = str(e)
+                    item.status = "failed"
+                finally:
+                    item.finished_at = time.time()
+
+        await asyncio.gather(
+            *(run_item(item, blog) for item, blog in zip(job.items, blogs))
+        )
+
+    def _evict(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status == "done":
+                del self._jobs[job_id]
@@ -1,3 +1,9 @@
+import asyncio
+import time
+import uuid
+from dataclasses import fields
+from typing import Optional
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Send
 from .graph_components.configuration import (
@@ -10,56 +16,179 @@ from .graph_components.state import (
     SectionState,
 )
 from .graph_components import configuration as dynamic_configuration
+from .graph_components.sources import prepare_sources
+from .graph_components.retrieval import retrieve_passages
+from .graph_components.metrics import timed_node
+from .graph_components.markdown import MarkdownRenderer, section_key
+from .graph_components.artifacts import artifacts, run_id
+from .graph_components.llm import get_deployment_llm, get_llm
+from .graph_components.llm_cache import get_response_cache
+from .graph_components.prompt_builder import load_encoding
+from .graph_components.routing import model_router
+from langchain_core.runnables import RunnableConfig
 from .people import MrSearch, MrCurator, MrPlanner, MrCompiler, MrWriter
+from .people.mr_search import tavily_client
+from .jobs import JobInProgress
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Nodes whose completion is reported as a progress event on the stream.
+PROGRESS_NODES = ("search", "curate", "prepare", "plan", "compile_main", "compile_blog")
+# Nodes whose LLM tokens are forwarded to the stream as they arrive.
+WRITER_NODES = ("write_main", "write_not_main")
+# Types of this package stored in checkpoints. The checkpointer only restores the
+# ones listed here (see checkpoint_serializer).
+CHECKPOINTED_TYPES = (
+    ("backend.graph_components.state", "Section"),
+    ("backend.graph_components.state", "SectionState"),
+)
+# State fields held in the artifact store during a run, by the field carrying their ID.
+ARTIFACT_FIELDS = {
+    "sources_ref": "sources",
+    "passages_ref": "passages",
+    "main_sections_ref": "main_sections",
+}
+
+
+def _read(output, key, default=None):
+    """Reads a key from a node output, which is either a partial-state dict or a BlogState."""
+    if isinstance(output, dict):
+        return output.get(key, default)
+    return getattr(output, key, default)
+
+
+def checkpoint_serializer() -> JsonPlusSerializer:
+    """The checkpoint serializer, allowed to restore this package's state types."""
+    return JsonPlusSerializer(allowed_msgpack_modules=list(CHECKPOINTED_TYPES))
+
 
 class MrSupervisor:
-    def __init__(self):
-        pass
+    def __init__(self, checkpointer=None, ledger=None, store=None):
+        """
+        Builds the agents and compiles the blog graph once.
+
+        The compiled graph holds no per-request state, so a single MrSupervisor
+        can be shared by every request for the lifetime of the process.
+
+        With a checkpointer, every completed node is persisted under the run's
+        thread ID, so a failed or interrupted run resumes from its last completed
+        node (see ``aresume``) instead of starting over. The optional JobLedger
+        records the status of every run, and the optional BlogStore keeps every
+        finished blog under its content address.
+        """
+        self.checkpointer = checkpointer
+        self.ledger = ledger
+        self.store = store
+        self.search_agent = MrSearch()
+        self.curator_agent = MrCurator()
+        self.planner_agent = MrPlanner()
+        self.writer_agent = MrWriter()
+        self.compiler_agent = MrCompiler()
+        self.chain = self.build()
 
-    def write_main_sections(self, blog: BlogState) -> None:
+    def warm_up(self) -> None:
+        """
+        Builds the model and search clients and loads the prompt tokenizer ahead of
+        the first request.
+
+        Clients are otherwise built on first use; warming them up front moves the
+        openai and tavily imports out of the request path and surfaces missing Azure
+        settings as an EnvironmentError before the process reports itself ready.
+        """
+        get_llm()
+        get_response_cache()
+        load_encoding()
+        self.curator_agent.llm
+        # Deployments routed to by the environment's configuration, e.g. LLM_ROUTES.
+        configurable = dynamic_configuration.Configuration.from_runnable_config()
+        for deployment in model_router.deployments(configurable):
+            get_deployment_llm(deployment)
+        if self.search_agent.client is None:
+            tavily_client()
+
+    def section_state(
+        self,
+        blog: BlogState,
+        section,
+        configurable: dynamic_configuration.Configuration,
+        main_sections_ref: str = None,
+    ) -> SectionState:
+        passages = retrieve_passages(
+            artifacts.get(blog.passages_ref, blog.passages),
+            f"{section.name} {section.description}",
+            configurable.section_passages,
+        )
+        return SectionState(
+            section=section,
+            title=blog.title,
+            passages_ref=blog.passages_ref,
+            passage_ids=tuple(passage["id"] for passage in passages),
+            main_sections_ref=main_sections_ref,
+        )
+
+    @staticmethod
+    def hydrate(values: dict) -> dict:
+        """Replaces the artifact IDs in a run's state with the artifacts they point to."""
+        for ref_field, field_name in ARTIFACT_FIELDS.items():
+            ref = values.pop(ref_field, None)
+            if ref is not None:
+                values[field_name] = artifacts.get(ref)
+        return values
+
+    def write_main_sections(self, blog: BlogState, config: RunnableConfig) -> None:
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
         results = []
         for section in blog.sections:
             if section.isMainBody:
                 results.append(
-                    Send(
-                        "write_main",
-                        SectionState(
-                            section=section,
-                            title=blog.title,
-                            sources=blog.sources,
-                            finalized_sections=[],
-                        ),
-                    )
+                    Send("write_main", self.section_state(blog, section, configurable))
                 )
+
+        if configurable.scheduling_mode == "overlap":
+            # Draft the introduction and conclusion from the planned main-body outline
+            # while the main bodies are being written.
+            outline = artifacts.put(
+                run_id(config),
+                self.compiler_agent.format_sections(
+                    [section for section in blog.sections if section.isMainBody]
+                ),
+            )
+            for section in blog.sections:
+                if not section.isMainBody:
+                    results.append(
+                        Send(
+                            "write_not_main",
+                            self.section_state(blog, section, configurable, outline),
+                        )
+                    )
         return results
 
-    def write_not_main_sections(self, blog: BlogState) -> None:
+    def write_not_main_sections(self, blog: BlogState, config: RunnableConfig) -> None:
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
+        if all(section.isMainBody for section in blog.sections):
+            return "compile_blog"
+        if configurable.scheduling_mode == "overlap":
+            # Already dispatched alongside the main bodies; they trigger compile_blog.
+            return []
+
         results = []
         for section in blog.sections:
             if not section.isMainBody:
                 results.append(
                     Send(
                         "write_not_main",
-                        SectionState(
-                            section=section,
-                            title=blog.title,
-                            sources=blog.sources,
-                            finalized_sections=[],
-                        ),
+                        self.section_state(blog, section, configurable, blog.main_sections_ref),
                     )
                 )
         return results
 
-    def run(self, blog: BlogState) -> BlogState:
-        search_agent = MrSearch()
-        curator_agent = MrCurator()
-        planner_agent = MrPlanner()
-        writer_agent = MrWriter()
-        compiler_agent = MrCompiler()
+    def build(self):
+        search_agent = self.search_agent
+        curator_agent = self.curator_agent
+        planner_agent = self.planner_agent
+        writer_agent = self.writer_agent
+        compiler_agent = self.compiler_agent
 
         builder = StateGraph(
             BlogState,
@@ -67,28 +196,404 @@ class MrSupervisor:
             # output=BlogStateOutput,
             config_schema=dynamic_configuration.Configuration,
         )
-        builder.add_node("search", search_agent.run)
-        builder.add_node("curate", curator_agent.run)
-        builder.add_node("plan", planner_agent.run)
-        builder.add_node("write_main", writer_agent.write_main)
-        builder.add_node("write_not_main", writer_agent.write_not_main)
-        builder.add_node("compile_main", compiler_agent.compile_main_sections)
-        builder.add_node("compile_blog", compiler_agent.compile_blog)
+        builder.add_node("search", timed_node("search", search_agent.run))
+        builder.add_node("curate", timed_node("curate", curator_agent.run))
+        builder.add_node("prepare", timed_node("prepare", curator_agent.prepare))
+        builder.add_node("plan", timed_node("plan", planner_agent.run))
+        builder.add_node("write_main", timed_node("write_main", writer_agent.write_main))
+        builder.add_node("write_not_main", timed_node("write_not_main", writer_agent.write_not_main))
+        builder.add_node("compile_main", timed_node("compile_main", compiler_agent.compile_main_sections))
+        builder.add_node("compile_blog", timed_node("compile_blog", compiler_agent.compile_blog))
 
         builder.add_edge("search", "curate")
-        builder.add_edge("curate", "plan")
-        builder.add_conditional_edges("plan", self.write_main_sections, ["write_main"])
+        builder.add_edge("curate", "prepare")
+        builder.add_edge("prepare", "plan")
+        builder.add_conditional_edges(
+            "plan", self.write_main_sections, ["write_main", "write_not_main"]
+        )
         builder.add_edge("write_main", "compile_main")
         builder.add_conditional_edges(
-            "compile_main", self.write_not_main_sections, ["write_not_main"]
+            "compile_main",
+            self.write_not_main_sections,
+            ["write_not_main", "compile_blog"],
         )
         builder.add_edge("write_not_main", "compile_blog")
 
         builder.set_entry_point("search")
         builder.set_finish_point("compile_blog")
 
-        chain = builder.compile()
-        return chain.invoke(blog)
+        return builder.compile(checkpointer=self.checkpointer)
+
+    @staticmethod
+    def thread_config(thread_id: str, config: Optional[RunnableConfig] = None) -> RunnableConfig:
+        config = dict(config or {})
+        config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+        return config
+
+    async def arun(
+        self,
+        blog: BlogState,
+        config: Optional[RunnableConfig] = None,
+        thread_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Generates a blog and returns the final state, including its "thread_id".
+
+        A new thread ID is created when none is given.
+        """
+        thread_id = thread_id or uuid.uuid4().hex
+        return await self.tracked(thread_id, blog.title, blog, config)
+
+    async def aresume(
+        self,
+        thread_id: str,
+        config: Optional[RunnableConfig] = None,
+        interrupted_owner: Optional[str] = None,
+    ) -> dict:
+        """
+        Resumes a run from its last checkpoint.
+
+        Nodes that already completed, including every section that was written
+        successfully, are not run again. A run that is still running is not resumed,
+        unless it is taken over from ``interrupted_owner``, the ledger owner of a
+        process that was cut off while running it.
+
+        Raises:
+        - RuntimeError: If the supervisor has no checkpointer.
+        - KeyError: If nothing was checkpointed for ``thread_id``.
+        - JobInProgress: If the run is running, or another worker took it over first.
+        """
+        if self.checkpointer is None:
+            raise RuntimeError("Resuming a run requires a checkpointer.")
+        snapshot = await self.chain.aget_state(self.thread_config(thread_id))
+        if not snapshot.values:
+            raise KeyError(thread_id)
+        if not snapshot.next:
+            return self.hydrate({**snapshot.values, "thread_id": thread_id})
+        claimed = False
+        if interrupted_owner is not None and self.ledger is not None:
+            if not self.ledger.take_over(thread_id, interrupted_owner):
+                raise JobInProgress(f"Run {thread_id} was taken over by another worker or is no longer running.")
+            claimed = True
+        return await self.tracked(thread_id, snapshot.values["title"], None, config, claimed)
+
+    async def aexpire(self, max_age: float) -> int:
+        """
+        Deletes the ledger rows and checkpoints of runs that finished or failed more
+        than ``max_age`` seconds ago, the lifetime of their artifacts, and returns how
+        many runs were deleted. Running runs are kept.
+        """
+        if self.ledger is None or max_age <= 0:
+            return 0
+        expired = await asyncio.to_thread(self.ledger.expire, time.time() - max_age)
+        if self.checkpointer is not None:
+            for thread_id in expired:
+                await self.checkpointer.adelete_thread(thread_id)
+        return len(expired)
+
+    def claim(self, thread_id: str, title: str, attempt: bool = True) -> None:
+        """
+        Marks a run as running in the ledger; ``attempt`` counts it as a new attempt.
+
+        Raises:
+        - JobInProgress: If the run is already running.
+        """
+        if self.ledger is not None and not self.ledger.start(thread_id, title, attempt):
+            raise JobInProgress(f"Run {thread_id} is already running.")
+
+    def fail(self, thread_id: str, error: BaseException) -> None:
+        """
+        Marks a run failed in the ledger, so it can be resumed.
+
+        Runs are also cancelled, e.g. when every client waiting on a coalesced or
+        streamed run has left; those are recorded as failed too, never left running.
+        """
+        if self.ledger is not None:
+            self.ledger.fail(thread_id, str(error) or type(error).__name__)
+
+    async def tracked(
+        self,
+        thread_id: str,
+        title: str,
+        blog: Optional[BlogState],
+        config,
+        claimed: bool = False,
+    ) -> dict:
+        if not claimed:
+            self.claim(thread_id, title)
+        try:
+            result = self.hydrate(
+                await self.chain.ainvoke(blog, self.thread_config(thread_id, config))
+            )
+        except BaseException as e:
+            self.fail(thread_id, e)
+            raise
+        finally:
+            artifacts.release(thread_id)
+        if self.ledger is not None:
+            self.ledger.finish(thread_id)
+        result["thread_id"] = thread_id
+        self.save(result, config)
+        return result
+
+    def save(self, result: dict, config: Optional[RunnableConfig] = None) -> None:
+        """Stores a finished blog and records its "blog_id" and "etag" on ``result``."""
+        if self.store is None:
+            return
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
+        stored = self.store.put(result, configurable.blog_structure)
+        result["blog_id"], result["etag"] = stored["id"], stored["etag"]
+
+    def summarize_node(self, node: str, output) -> dict:
+        """Builds the compact progress payload sent when a node completes."""
+        event = {"event": "node", "node": node}
+        if node == "search":
+            event["sources"] = len(artifacts.get(_read(output, "sources_ref"), []))
+            event["images"] = len(_read(output, "images", []))
+        elif node == "prepare":
+            event["passages"] = len(artifacts.get(_read(output, "passages_ref"), []))
+        elif node == "curate":
+            event["sources"] = [
+                source["url"] for source in artifacts.get(_read(output, "sources_ref"), [])
+            ]
+        elif node == "plan":
+            event["sections"] = [
+                {"name": section.name, "isMainBody": section.isMainBody}
+                for section in _read(output, "sections", [])
+            ]
+        elif node in WRITER_NODES:
+            section = _read(output, "finalized_sections", [])[0]
+            event["section"] = section.name
+            event["content"] = section.content
+        return event
+
+    async def aregenerate(
+        self,
+        section_name: str,
+        blog: Optional[BlogState] = None,
+        thread_id: Optional[str] = None,
+        refresh_dependents: bool = True,
+        config: Optional[RunnableConfig] = None,
+    ) -> dict:
+        """
+        Rewrites one section of an existing blog, reusing its plan, passages and other sections.
+
+        Only the requested section is sent to the writer. In staged scheduling the
+        introduction and conclusion are written from the main bodies, so they are
+        rewritten too when a main-body section changed and ``refresh_dependents`` is set.
+        The blog is then recompiled. When ``thread_id`` is given, the blog is loaded from
+        that run's checkpoint and the result is saved back to it.
+
+        Raises:
+        - KeyError: If the run or the section does not exist.
+        - JobInProgress: If the run is still running.
+        """
+        if thread_id is None:
+            values = {field.name: getattr(blog, field.name) for field in fields(blog)}
+            # A blog sent by the client carries its artifacts inline; IDs it still
+            # holds may point at artifacts this process never had.
+            for ref_field in ARTIFACT_FIELDS:
+                values.pop(ref_field, None)
+            return await self.rewrite(section_name, values, None, refresh_dependents, config)
+
+        if self.checkpointer is None:
+            raise RuntimeError("Loading a run requires a checkpointer.")
+        snapshot = await self.chain.aget_state(self.thread_config(thread_id))
+        if not snapshot.values:
+            raise KeyError(thread_id)
+        values = self.hydrate(dict(snapshot.values))
+        # The run is held while its section is rewritten, so it is neither resumed
+        # nor regenerated concurrently. It was read before being held, but holding
+        # fails for a run that is still running, so a mid-run state is never used.
+        previous = self.ledger.get(thread_id) if self.ledger is not None else None
+        self.claim(thread_id, values["title"], attempt=False)
+        try:
+            result = await self.rewrite(section_name, values, thread_id, refresh_dependents, config)
+        except BaseException as e:
+            if previous is not None:
+                self.ledger.restore(thread_id, previous)
+            else:
+                self.fail(thread_id, e)
+            raise
+        if self.ledger is not None:
+            self.ledger.finish(thread_id)
+        return result
+
+    async def rewrite(
+        self,
+        section_name: str,
+        values: dict,
+        thread_id: Optional[str],
+        refresh_dependents: bool,
+        config: Optional[RunnableConfig],
+    ) -> dict:
+        """Rewrites ``section_name`` of the blog in ``values``; see aregenerate."""
+        # Regenerating must produce a new draft, so skip cached completions but
+        # store the fresh ones. A call-level cache mode wins over LLM_CACHE_MODE.
+        config = dict(config or {})
+        config["configurable"] = {
+            **config.get("configurable", {}),
+            "llm_cache_mode": "refresh",
+        }
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
+
+        written = {section_key(section): section.content for section in values["finalized_sections"]}
+        sections = [
+            section.model_copy(update={"content": written.get(section_key(section), section.content)})
+            for section in values["sections"]
+        ]
+        target = next((section for section in sections if section.name == section_name), None)
+        if target is None:
+            raise KeyError(section_name)
+
+        run = thread_id or uuid.uuid4().hex
+        passages = values.get("passages") or prepare_sources(
+            values.get("sources") or [], configurable.source_token_budget
+        )
+        state = BlogState(
+            title=values["title"],
+            finalized_sections=sections,
+            sources=values.get("sources") or [],
+            images=values.get("images") or [],
+            passages=passages,
+            sections=sections,
+            main_sections=values.get("main_sections"),
+            passages_ref=artifacts.put(run, passages),
+        )
+
+        def outline() -> str:
+            return self.compiler_agent.format_sections(
+                [section for section in sections if section.isMainBody]
+            )
+
+        rewritten = []
+        try:
+            if target.isMainBody:
+                result = await self.writer_agent.write_main(
+                    self.section_state(state, target, configurable), config
+                )
+                rewritten.extend(result["finalized_sections"])
+                changed = result["finalized_sections"][0].content != written.get(section_key(target))
+                state.main_sections = outline()
+                state.main_sections_ref = artifacts.put(run, state.main_sections)
+                if changed and refresh_dependents and configurable.scheduling_mode == "staged":
+                    results = await asyncio.gather(
+                        *(
+                            self.writer_agent.write_not_main(
+                                self.section_state(state, section, configurable, state.main_sections_ref),
+                                config,
+                            )
+                            for section in sections
+                            if not section.isMainBody
+                        )
+                    )
+                    for result in results:
+                        rewritten.extend(result["finalized_sections"])
+            else:
+                main_sections = state.main_sections
+                if configurable.scheduling_mode == "overlap" or not main_sections:
+                    main_sections = outline()
+                result = await self.writer_agent.write_not_main(
+                    self.section_state(state, target, configurable, artifacts.put(run, main_sections)),
+                    config,
+                )
+                rewritten.extend(result["finalized_sections"])
+        finally:
+            artifacts.release(run)
+
+        update = self.compiler_agent.compile_blog(state)
+        if thread_id is not None:
+            # finalized_sections is append-only; the compiler keeps the last version
+            # of each section, so appending the rewritten ones supersedes the old drafts.
+            checkpointed = {**update, "finalized_sections": rewritten}
+            if state.main_sections_ref is not None:
+                checkpointed["main_sections_ref"] = state.main_sections_ref
+            await self.chain.aupdate_state(
+                self.thread_config(thread_id), checkpointed, as_node="compile_blog"
+            )
+
+        values.update(update)
+        values["main_sections"] = state.main_sections
+        values["finalized_sections"] = update["sections"]
+        values["regenerated_sections"] = [section.name for section in rewritten]
+        if thread_id is not None:
+            values["thread_id"] = thread_id
+        self.save(values, config)
+        return values
+
+    async def astream(self, blog: BlogState, thread_id: Optional[str] = None):
+        """
+        Runs the graph and yields progress events as they happen.
+
+        Events are plain dicts:
+        - {"event": "node", "node": ...} when search, curate, plan or a compile step finishes.
+        - {"event": "token", "node": ..., "section": ..., "delta": ...} for each writer token.
+        - {"event": "node", "node": "write_main"/"write_not_main", "section": ..., "content": ...}
+          when a section is fully written.
+        - {"event": "markdown", "delta": ...} with the next stretch of the final markdown,
+          in plan order, as soon as the sections it covers are written.
+        - {"event": "done", "finalized_blog": ..., "thread_id": ..., "blog_id": ...} once the
+          blog is compiled; "blog_id" is only set when finished blogs are stored.
+        """
+        thread_id = thread_id or uuid.uuid4().hex
+        self.claim(thread_id, blog.title)
+        try:
+            async for event in self.stream_events(blog, thread_id):
+                yield event
+        except BaseException as e:
+            # GeneratorExit when the consumer stops early, e.g. a disconnected client.
+            self.fail(thread_id, e)
+            raise
+        finally:
+            artifacts.release(thread_id)
+        if self.ledger is not None:
+            self.ledger.finish(thread_id)
+
+    async def stream_events(self, blog: BlogState, thread_id: str):
+        renderer = None
+        async for event in self.chain.astream_events(
+            blog, self.thread_config(thread_id), version="v2"
+        ):
+            kind = event["event"]
+            node = event["metadata"].get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node in WRITER_NODES:
+                delta = event["data"]["chunk"].content
+                # Only the primary attempt streams; a fallback's draft arrives with the section.
+                if delta and not event["metadata"].get("fallback"):
+                    yield {
+                        "event": "token",
+                        "node": node,
+                        "section": event["metadata"].get("section"),
+                        "delta": delta,
+                    }
+            elif kind == "on_chain_end" and event["name"] == node:
+                output = event["data"].get("output")
+                if node in PROGRESS_NODES or node in WRITER_NODES:
+                    yield self.summarize_node(node, output)
+                if node == "plan":
+                    renderer = MarkdownRenderer(_read(output, "sections", []))
+                elif node in WRITER_NODES and renderer is not None:
+                    delta = renderer.add(_read(output, "finalized_sections", [])[0])
+                    if delta:
+                        yield {"event": "markdown", "delta": delta}
+            elif kind == "on_chain_end" and not event["parent_ids"]:
+                output = event["data"].get("output")
+                result = self.hydrate(
+                    {field.name: _read(output, field.name) for field in fields(BlogState)}
+                )
+                result["thread_id"] = thread_id
+                self.save(result)
+                yield {
+                    "event": "done",
+                    "finalized_blog": result["finalized_blog"],
+                    "thread_id": thread_id,
+                    "blog_id": result.get("blog_id"),
+                }
+
+    def run(self, blog: BlogState) -> BlogState:
+        # The agents are coroutines, so synchronous callers drive them on a fresh loop.
+        return asyncio.run(self.arun(blog))
 
 
 sample_title = "The Future of AI in Healthcare: Transforming Patient Care"
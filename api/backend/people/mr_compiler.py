@@ -1,4 +1,7 @@
 from ..graph_components.state import BlogState, Section
+from ..graph_components.markdown import iter_markdown, section_key
+from ..graph_components.artifacts import artifacts, run_id
+from langchain_core.runnables import RunnableConfig
 
 
 class MrCompiler:
@@ -7,9 +10,9 @@ class MrCompiler:
 
     def format_sections(self, sections: list[Section]) -> str:
         """Format a list of sections into a string, skipping main_body"""
-        formatted_str = ""
+        parts = []
         for idx, section in enumerate(sections, 1):
-            formatted_str += f"""
+            parts.append(f"""
             {'=' * 50}
             📖 Section {idx}: {section.name}
             {'=' * 50}
@@ -18,21 +21,25 @@ class MrCompiler:
 
             📂 Content:
             {section.content if section.content else '[Not yet written]'}
-            """
-        return formatted_str
+            """)
+        return "".join(parts)
 
-    def compile_main_sections(self, blog: BlogState) -> None:
+    def compile_main_sections(self, blog: BlogState, config: RunnableConfig) -> None:
         finalized_sections = blog.finalized_sections
         completed_report_sections = self.format_sections(finalized_sections)
-        return {"main_sections": completed_report_sections}
+        # Every introduction/conclusion writer reads this; they are sent its ID, not a copy.
+        return {"main_sections_ref": artifacts.put(run_id(config), completed_report_sections)}
 
     def compile_blog(self, blog: BlogState) -> None:
-        sections = blog.sections
-        finalized_sections = {s.name: s.content for s in blog.finalized_sections}
-
-        for section in sections:
-            section.content = finalized_sections[section.name]
-
-        all_sections = "\n\n".join([s.content for s in sections])
-        # print(all_sections)
-        return {"finalized_blog": all_sections}
+        """
+        Fills each planned section with its latest draft and joins them in plan order.
+
+        Drafts are matched by section ID in one pass; a later draft of a section
+        supersedes an earlier one, and a section without a draft keeps its planned content.
+        """
+        written = {section_key(section): section.content for section in blog.finalized_sections}
+        sections = [
+            section.model_copy(update={"content": written.get(section_key(section), section.content)})
+            for section in blog.sections
+        ]
+        return {"sections": sections, "finalized_blog": "".join(iter_markdown(sections))}
@@ -1,14 +1,18 @@
 from datetime import datetime
-import os
+import functools
 from langchain_core.prompts import ChatPromptTemplate
 from ..graph_components.state import BlogState
-from langchain_openai import AzureChatOpenAI
+from ..graph_components import configuration as dynamic_configuration
+from ..graph_components.llm_cache import get_response_cache
+from ..graph_components.artifacts import artifacts, run_id
+from langchain_core.runnables import RunnableConfig
+from ..graph_components.sources import prepare_sources
+from ..graph_components.ranking import rank_sources
+from ..graph_components.llm import build_chat_model
+from ..graph_components.structured import StructuredOutputError, parse_structured
 from pydantic import BaseModel
-from langchain.output_parsers import PydanticOutputParser
 from typing import List
 
-import ast
-
 
 class SourceURLs(BaseModel):
     source_urls: List[str]
@@ -19,27 +23,15 @@ class MrCurator:
         """
         Initializes MrCurator class with Azure Chat OpenAI LLM and a prompt template.
 
-        The class is responsible for curating content by selecting the two most relevant, insightful,
-        and credible articles from a list. It uses Azure Chat OpenAI LLM to generate prompts and
-        evaluate the articles based on the provided criteria.
-
-        Raises:
-            EnvironmentError: If Azure OpenAI deployment details are missing in the environment variables.
+        The class is responsible for curating content by selecting the most relevant, insightful,
+        and credible articles from a list. Articles are ranked locally; the Azure Chat OpenAI LLM
+        is only asked to break ties between candidates the ranking cannot separate.
 
         Attributes:
-            llm (AzureChatOpenAI): Azure Chat OpenAI LLM for generating and evaluating prompts.
+            llm (AzureChatOpenAI): Azure Chat OpenAI LLM for generating and evaluating prompts,
+                built on first use.
             prompt_template (PromptTemplate): Prompt template for curating content.
         """
-        deployment_name = os.environ.get("AZURE_OPENAI_DEPLOYMENT")
-        api_version = os.environ.get("AZURE_API_VERSION")
-
-        if not deployment_name or not api_version:
-            raise EnvironmentError("Azure OpenAI deployment details are missing.")
-
-        self.llm = AzureChatOpenAI(
-            azure_deployment=deployment_name, api_version=api_version, max_retries=1
-        )
-
         self.prompt_template = ChatPromptTemplate(
             [
                 (
@@ -57,55 +49,127 @@ class MrCurator:
                     """
                     Today's date is {date}
                     Topic: {title}
-                    Your task is to identify and provide only two most relevant and high-quality articles related to 
+                    Your task is to identify and provide only the {count} most relevant and high-quality articles related to 
                     the given topic or query. These articles should be well-researched, credible, and offer 
                     valuable insights for a content-focused blog or publication.
                     Here is a list of articles:
                     {sources}
-                    Please return only a list of the two URLs in the following structure: 
-                    {schema}
+                    Please return only the {count} URLs you selected.
                     """,
                 ),
             ]
         )
 
-    def curate(self, title: str, sources: list) -> list:
+    @functools.cached_property
+    def llm(self):
+        """
+        The tiebreak model. Only breaks ties, so it retries once instead of holding up the run.
+
+        Raises:
+            EnvironmentError: If Azure OpenAI deployment details are missing in the environment variables.
+        """
+        return build_chat_model(max_retries=1)
+
+    async def curate(
+        self,
+        title: str,
+        sources: list,
+        configurable: dynamic_configuration.Configuration = None,
+    ) -> list:
         """
         Curates a list of articles based on the provided title and sources.
 
-        The function uses Azure Chat OpenAI LLM to generate a prompt and evaluate the articles.
-        It selects the two most relevant, insightful, and credible articles from the given list.
+        Sources are ranked locally (Tavily score, BM25 relevance to the title, domain
+        credibility, near-duplicate removal) and the best ``curated_sources`` are kept.
+        The LLM is only consulted when candidates around the cut-off score within
+        ``curation_tiebreak_margin`` of each other, and then only sees those candidates.
 
         Parameters:
         - title (str): The title of the blog or publication.
         - sources (list): A list of URLs representing the articles to be curated.
+        - configurable (Configuration): The run configuration.
 
         Returns:
-        - list: A list of URLs representing the two most relevant and high-quality articles.
-
-        Raises:
-        - EnvironmentError: If Azure OpenAI deployment details are missing in the environment variables.
+        - list: The selected sources, best first.
         """
-
-        parser = PydanticOutputParser(pydantic_object=SourceURLs)
-        schema = parser.get_format_instructions()
+        configurable = configurable or dynamic_configuration.Configuration()
+        count = configurable.curated_sources
+        ranked = rank_sources(title, sources)
+        if len(ranked) <= count:
+            return [source for _, source in ranked]
+
+        cutoff = ranked[count - 1][0]
+        if cutoff - ranked[count][0] >= configurable.curation_tiebreak_margin:
+            return [source for _, source in ranked[:count]]
+
+        # Sources clearly above the cut-off are kept; the LLM chooses among the rest.
+        kept = [
+            source
+            for score, source in ranked[:count]
+            if score - cutoff >= configurable.curation_tiebreak_margin
+        ]
+        contenders = [
+            source
+            for score, source in ranked
+            if abs(score - cutoff) < configurable.curation_tiebreak_margin
+        ]
+        needed = count - len(kept)
+        return kept + await self.tiebreak(title, contenders, needed, configurable)
+
+    async def tiebreak(
+        self,
+        title: str,
+        candidates: list,
+        count: int,
+        configurable: dynamic_configuration.Configuration,
+    ) -> list:
+        """Asks the LLM to pick ``count`` of ``candidates``, falling back to their ranked order."""
         formatted_prompt = self.prompt_template.format(
             date=datetime.now().strftime("%d/%m/%Y"),
             title=title,
-            sources=sources,
-            schema=schema,
+            count=count,
+            sources=[
+                {key: source.get(key) for key in ("title", "url", "content")}
+                for source in candidates
+            ],
         )
 
-        response = self.llm.invoke(formatted_prompt)
-        filtered_sources = parser.invoke(response)
-        filtered_source_urls = [
-            i for i in sources if i["url"] in filtered_sources.source_urls
-        ]
-        return filtered_source_urls
+        response = await get_response_cache().ainvoke(
+            self.llm,
+            formatted_prompt,
+            node="curate",
+            configurable=configurable,
+            schema=SourceURLs,
+        )
+        try:
+            chosen = set(parse_structured(response, SourceURLs, node="curate").source_urls)
+        except StructuredOutputError:
+            chosen = set()
+        picked = [source for source in candidates if source["url"] in chosen][:count]
+        # A malformed or hallucinated answer must never leave the blog without sources.
+        for source in candidates:
+            if len(picked) >= count:
+                break
+            if source not in picked:
+                picked.append(source)
+        return picked
+
+    async def run(self, blog: BlogState, config: RunnableConfig):
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
+        sources = artifacts.get(blog.sources_ref, blog.sources)
+        curated = await self.curate(blog.title, sources, configurable)
+        return {"sources_ref": artifacts.put(run_id(config), curated)}
+
+    def prepare(self, blog: BlogState, config: RunnableConfig):
+        """
+        Compacts the curated sources into de-duplicated passages within the token budget.
 
-    def run(self, blog: BlogState):
-        blog.sources = self.curate(blog.title, blog.sources)
-        return blog
+        Writers receive only a selection of these passages instead of the raw search results.
+        """
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
+        sources = artifacts.get(blog.sources_ref, blog.sources)
+        passages = prepare_sources(sources, configurable.source_token_budget)
+        return {"passages_ref": artifacts.put(run_id(config), passages)}
 
 
 # blog = {
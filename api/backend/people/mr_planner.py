@@ -1,40 +1,53 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from ..graph_components.state import BlogState, Sections
 from langchain_core.runnables import RunnableConfig
-from langchain.output_parsers import PydanticOutputParser
 from ..graph_components import configuration as dynamic_configuration
-from ..graph_components.prompts import blogPlannerInstructions
-from ..graph_components.llm import llm
+from ..graph_components.prompts import blogPlannerTemplate
+from ..graph_components.prompt_builder import Trimmable, budget_for, build_prompt
+from ..graph_components.llm import get_llm
+from ..graph_components.sources import format_passages
+from ..graph_components.llm_cache import get_response_cache
+from ..graph_components.artifacts import artifacts
+from ..graph_components.structured import parse_structured
 
 
 class MrPlanner:
     def __init__(self):
         pass
 
-    def run(self, blog: BlogState, config: RunnableConfig) -> None:
+    async def run(self, blog: BlogState, config: RunnableConfig) -> None:
         configurable = dynamic_configuration.Configuration.from_runnable_config(config)
-        system_prompt = blogPlannerInstructions.format(
+        passages = artifacts.get(blog.passages_ref, blog.passages)
+        # Passages come best source first, so the last ones are dropped when over budget.
+        system_prompt = build_prompt(
+            blogPlannerTemplate,
+            "plan",
+            budget_for("plan", configurable),
+            trim_order=("sources",),
             userInstructions=blog.title,
             blogStructure=configurable.blog_structure,
-            sources=blog.sources,
+            sources=Trimmable([format_passages([passage]) for passage in passages]),
             images=blog.images,
         )
-        parser = PydanticOutputParser(pydantic_object=Sections)
-        response = llm.invoke(
+        response = await get_response_cache().ainvoke(
+            get_llm(),
             [
                 SystemMessage(
                     content=system_prompt
                 ),  # System message with the system prompt
+                # The Sections schema is sent as a strict tool, so the prompt carries no format instructions.
                 HumanMessage(
-                    content=(
-                        "Generate the sections of the blog. Your response must include a 'sections' field containing "
-                        "a list of sections. Each section should have the following fields: "
-                        f"{parser.get_format_instructions()}"
-                    )
+                    content="Generate the sections of the blog."
                 ),
-            ]
+            ],
+            node="plan",
+            configurable=configurable,
+            schema=Sections,
         )
 
-        blog_sections = parser.invoke(response)
+        blog_sections = parse_structured(response, Sections, node="plan")
+        # Sections are assembled by ID, so duplicate names cannot collide.
+        for index, section in enumerate(blog_sections.sections):
+            section.id = f"s{index}"
         # print(sections)
         return {"sections": blog_sections.sections}
@@ -1,38 +1,126 @@
-from tavily import TavilyClient
+import asyncio
+import functools
 from ..graph_components.state import BlogState
+from ..graph_components import configuration as dynamic_configuration
+from ..graph_components.queries import query_variants
+from ..graph_components.sources import content_hash
+from ..graph_components.artifacts import artifacts, run_id
+from langchain_core.runnables import RunnableConfig
+from ..graph_components.cache import LRUCache, SQLiteCache, TieredCache
+from ..graph_components.http_clients import http_clients
+from ..graph_components.metrics import record_search
+from ..graph_components.singleflight import SingleFlight
+import json
 import os
-from dotenv import load_dotenv
+import re
+import tempfile
+import time
+from typing import List, Optional
 
-load_dotenv()
-_TavilyClient = TavilyClient(api_key=os.environ.get("TAVILY_API_KEY"))
+SEARCH_PARAMS = {"topic": "general", "include_images": True}
+PLACEHOLDER_IMAGE = "https://placehold.co/600x400/png"
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # A query may fail just as the search stage cancels it; nobody awaits it then.
+    if not task.cancelled():
+        task.exception()
+
+
+@functools.lru_cache(maxsize=None)
+def tavily_client():
+    """The shared AsyncTavilyClient, built on first use."""
+    from tavily import AsyncTavilyClient
+
+    # Tavily sets its own headers and base URL on the client, so it gets a dedicated pool.
+    return AsyncTavilyClient(
+        api_key=os.environ.get("TAVILY_API_KEY"),
+        client=http_clients.async_client("tavily", retry=True),
+    )
+
+
+def normalize_query(search_query: str) -> str:
+    """Lowercases a query and strips punctuation and repeated whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", search_query.lower()).split())
+
+
+def search_cache_key(search_query: str, params: dict) -> str:
+    return json.dumps([normalize_query(search_query), params], sort_keys=True)
+
+
+def build_search_cache() -> Optional[TieredCache]:
+    """
+    Builds the search cache from environment variables.
+
+    SEARCH_CACHE_TTL is the entry lifetime in seconds (0 disables caching),
+    SEARCH_CACHE_SIZE the number of in-process entries, and SEARCH_CACHE_PATH the
+    SQLite file for the on-disk tier (an empty value keeps the cache in memory only).
+    """
+    ttl = float(os.environ.get("SEARCH_CACHE_TTL", 24 * 60 * 60))
+    if ttl <= 0:
+        return None
+    size = int(os.environ.get("SEARCH_CACHE_SIZE", 256))
+    path = os.environ.get(
+        "SEARCH_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "inkflow_search_cache.sqlite"),
+    )
+    disk = SQLiteCache(path, ttl=ttl) if path else None
+    return TieredCache(LRUCache(max_entries=size, ttl=ttl), disk)
 
 
 class MrSearch:
     """
-    A class to perform a search using TavilyClient and retrieve results.
+    A class to perform a search using AsyncTavilyClient and retrieve results.
 
     Attributes
     ----------
-    None
+    client : Optional[AsyncTavilyClient]
+        The search client; defaults to the shared client from tavily_client().
+    cache : Optional[TieredCache]
+        Cache of search responses keyed on the normalized query and search parameters.
 
     Methods
     -------
     search(search_query: str) -> Tuple[List[Dict[str, Any]], List[str]]:
         Performs a search using TavilyClient and returns the search results.
 
+    search_many(queries: List[str], ...) -> Tuple[List[Dict[str, Any]], List[str]]:
+        Runs several queries concurrently and merges their results.
+
     run(blog: dict) -> None:
         Runs a search and updates the blog dictionary with the search results.
     """
 
-    def __init__(self):
+    def __init__(self, client=None, cache: Optional[TieredCache] = None):
         """
         Initializes the mr_search class.
+
+        Parameters
+        ----------
+        client : optional
+            Any object with an async ``search(query, **params)`` method. Defaults to
+            the shared client from tavily_client().
+        cache : Optional[TieredCache]
+            The response cache. Defaults to one built from the environment.
         """
-        pass
+        self.client = client
+        self.cache = cache if cache is not None else build_search_cache()
+        # Overlapping queries from concurrent blogs share one Tavily call.
+        self.in_flight = SingleFlight()
 
-    def search(self, search_query: str):
+    async def fetch(self, search_query: str, key: str) -> dict:
+        """Calls the search client and stores the response in the cache."""
+        client = self.client or tavily_client()
+        started = time.perf_counter()
+        results = await client.search(search_query, **SEARCH_PARAMS)
+        record_search(search_query, time.perf_counter() - started)
+        if self.cache is not None:
+            self.cache.set(key, results)
+        return results
+
+    async def search(self, search_query: str):
         """
-        Performs a search using TavilyClient and returns the search results.
+        Performs a search using AsyncTavilyClient and returns the search results.
 
         Parameters
         ----------
@@ -44,24 +132,112 @@ class MrSearch:
         Tuple[List[Dict[str, Any]], List[str]]
             A tuple containing the search results (sources) and images.
         """
-        results = _TavilyClient.search(
-            search_query, topic="general", include_images=True
-        )
-        sources = results["results"]
+        key = search_cache_key(search_query, SEARCH_PARAMS)
+        results = self.cache.get(key) if self.cache is not None else None
+        if results is None:
+            results = await self.in_flight.do(
+                key, lambda: self.fetch(search_query, key)
+            )
+
+        # Hand out copies so later stages never mutate a cached response.
+        sources = [dict(source) for source in results["results"]]
         try:
-            images = results["images"]
+            images = list(results["images"])
         except:
-            images = ["https://placehold.co/600x400/png"]
+            images = [PLACEHOLDER_IMAGE]
         return sources, images
 
-    def run(self, blog: BlogState) -> None:
+    async def search_many(
+        self,
+        queries: List[str],
+        deadline: float,
+        min_sources: int,
+        min_score: float,
+    ):
+        """
+        Runs ``queries`` concurrently and merges their results, de-duplicated by URL and content.
+
+        Returns once ``min_sources`` distinct sources scoring at least ``min_score``
+        have arrived, or ``deadline`` seconds in, whichever comes first, instead of
+        waiting for the slowest query. Queries still running then are cancelled; a
+        Tavily call another search shares keeps running for it (see SingleFlight).
+
+        Returns
+        -------
+        Tuple[List[Dict[str, Any]], List[str]]
+            The merged sources, best Tavily score first, and the merged images.
+
+        Raises
+        ------
+        TimeoutError
+            If no results arrived within ``deadline`` seconds.
+        Exception
+            The first query's error, when every query failed.
+        """
+        tasks = [asyncio.create_task(self.search(query)) for query in queries]
+        for task in tasks:
+            task.add_done_callback(_retrieve)
+
+        sources, images, errors = [], [], []
+        seen_urls, seen_content = set(), set()
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + deadline
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(stop_at - loop.time(), 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                # Merge in query order, so the title's own results win ties.
+                for task in sorted(done, key=tasks.index):
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    found, found_images = task.result()
+                    for source in found:
+                        content = source.get("content")
+                        digest = content_hash(content) if content else None
+                        if source.get("url") in seen_urls or (digest and digest in seen_content):
+                            continue
+                        seen_urls.add(source.get("url"))
+                        seen_content.add(digest)
+                        sources.append(source)
+                    images.extend(image for image in found_images if image not in images)
+                strong = sum(1 for source in sources if (source.get("score") or 0) >= min_score)
+                if strong >= min_sources:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not sources and pending:
+            raise TimeoutError(f"No search results within {deadline} seconds.")
+        if not sources and errors:
+            raise errors[0]
+        sources.sort(key=lambda source: source.get("score") or 0, reverse=True)
+        return sources, images or [PLACEHOLDER_IMAGE]
+
+    async def run(self, blog: BlogState, config: RunnableConfig = None) -> None:
         """
         Runs a search and updates the blog dictionary with the search results.
 
+        The title and its local rewrites (see query_variants) are searched concurrently.
+        The results are kept in the run's artifact store; the state only gets their ID.
+
         Parameters
         ----------
         blog : dict
             The blog dictionary to be updated.
         """
-        res = self.search(blog.title)
-        return {"sources": res[0], "images": res[1]}
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
+        res = await self.search_many(
+            query_variants(blog.title, configurable.search_queries),
+            configurable.search_deadline,
+            configurable.search_min_sources,
+            configurable.search_min_score,
+        )
+        return {"sources_ref": artifacts.put(run_id(config), res[0]), "images": res[1]}
@@ -2,59 +2,99 @@ from langgraph.types import Send
 from langchain_core.messages import HumanMessage, SystemMessage
 from ..graph_components.state import BlogState, SectionState
 from langchain_core.runnables import RunnableConfig
-from langchain.output_parsers import PydanticOutputParser
 from ..graph_components import configuration as dynamic_configuration
 from ..graph_components.prompts import (
-    mainBodySectionWriterInstructions,
-    introConclusionInstructions,
+    mainBodySectionWriterTemplate,
+    introConclusionTemplate,
 )
-from ..graph_components.llm import llm
+from ..graph_components.prompt_builder import Trimmable, budget_for, build_prompt
+from ..graph_components.llm import get_llm
+from ..graph_components.sources import format_passages
+from ..graph_components.llm_cache import get_response_cache
+from ..graph_components.artifacts import artifacts
+
+
+def section_passages(state: SectionState) -> list:
+    """
+    The passages retrieved for a section, looked up in the run's artifact store,
+    most relevant first.
+    """
+    by_id = {p["id"]: p for p in artifacts.get(state.passages_ref, [])}
+    return [by_id[passage_id] for passage_id in state.passage_ids if passage_id in by_id]
+
+
+def passage_sources(state: SectionState) -> Trimmable:
+    """A section's passages as a prompt value whose least relevant passages are trimmed first."""
+    return Trimmable([format_passages([passage]) for passage in section_passages(state)])
 
 
 class MrWriter:
     def __init__(self):
         pass
 
-    def write_main(self, state: SectionState):
+    async def write_main(self, state: SectionState, config: RunnableConfig):
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
         section = state.section
-        system_instructions = mainBodySectionWriterInstructions.format(
+        system_instructions = build_prompt(
+            mainBodySectionWriterTemplate,
+            "write_main",
+            budget_for("write_main", configurable),
+            trim_order=("sources",),
             sectionName=section.name,
             sectionDescription=section.description,
             title=state.title,
-            sources=state.sources,
+            sources=passage_sources(state),
             imageUrl=section.image,
         )
-        section_content = llm.invoke(
+        response = await get_response_cache().ainvoke(
+            get_llm(),
             [SystemMessage(content=system_instructions)]
             + [
                 HumanMessage(
                     content="Generate a blog section based on the provided information."
                 )
-            ]
-        ).content
+            ],
+            node="write_main",
+            configurable=configurable,
+            # Tags the streamed tokens so the stream endpoint can route them per section.
+            metadata={"section": section.name},
+        )
+        section_content = response.content
         section.content = section_content
         return {"finalized_sections": [section]}
 
-    def write_not_main(self, state: SectionState):
+    async def write_not_main(self, state: SectionState, config: RunnableConfig):
+        configurable = dynamic_configuration.Configuration.from_runnable_config(config)
         section = state.section
 
-        system_instructions = introConclusionInstructions.format(
+        # Over budget, sources go first; the main-body text is only cut after them.
+        system_instructions = build_prompt(
+            introConclusionTemplate,
+            "write_not_main",
+            budget_for("write_not_main", configurable),
+            trim_order=("sources", "mainBodySections"),
             sectionName=section.name,
             sectionDescription=section.description,
             title=state.title,
-            mainBodySections=state.main_sections,
-            sources=state.sources,
+            mainBodySections=Trimmable([artifacts.get(state.main_sections_ref, "")]),
+            sources=passage_sources(state),
             imageUrl=section.image,
         )
 
-        section_content = llm.invoke(
+        response = await get_response_cache().ainvoke(
+            get_llm(),
             [SystemMessage(content=system_instructions)]
             + [
                 HumanMessage(
                     content="Generate a blog section based on the provided information."
                 )
-            ]
-        ).content
+            ],
+            node="write_not_main",
+            configurable=configurable,
+            # Tags the streamed tokens so the stream endpoint can route them per section.
+            metadata={"section": section.name},
+        )
+        section_content = response.content
 
         section.content = section_content
         return {"finalized_sections": [section]}
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, List, Optional
+from unittest import mock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+WORDS = (
+    "python asyncio event loop coroutine thread process latency throughput cache "
+    "network socket request response queue worker scheduler memory buffer stream "
+    "token model prompt section source passage graph node state checkpoint"
+).split()
+
+
+class MockLLMError(Exception):
+    """A simulated API failure; ``status_code`` 429 also triggers the limiter cooldown."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Simulated LLM failure (HTTP {status_code}).")
+        self.status_code = status_code
+
+
+class MockChatModel(BaseChatModel):
+    """
+    A chat model that answers every prompt of the blog graph locally.
+
+    The curator gets the requested number of source URLs back, the planner gets
+    ``sections`` sections and writers get ``section_tokens`` words of markdown.
+    Each call waits ``latency`` seconds (plus up to ``jitter``) before its first
+    token and then streams at ``tokens_per_second``; ``failure_rate`` of calls raise
+    MockLLMError instead.
+    """
+
+    latency: float = 0.2
+    jitter: float = 0.05
+    tokens_per_second: float = 200.0
+    failure_rate: float = 0.0
+    failure_status: int = 500
+    sections: int = 4
+    section_tokens: int = 300
+    seed: Optional[int] = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": "mock", "sections": self.sections, "section_tokens": self.section_tokens}
+
+    def reply(self, messages: List[BaseMessage]) -> str:
+        text = "\n".join(str(message.content) for message in messages)
+        if "content curator" in text:
+            count = int((re.search(r"only the (\d+) most relevant", text) or [0, 2])[1])
+            urls = re.findall(r"'url': '([^']+)'", text)
+            return json.dumps({"source_urls": urls[:count]})
+        if "Generate the sections of the blog" in text:
+            names = ["Introduction"] + [f"Part {i}" for i in range(1, self.sections - 1)] + ["Conclusion"]
+            return json.dumps(
+                {
+                    "sections": [
+                        {
+                            "name": name,
+                            "description": " ".join(random.sample(WORDS, 6)),
+                            "image": "https://placehold.co/600x400/png",
+                            "content": "",
+                            "isMainBody": name not in ("Introduction", "Conclusion"),
+                        }
+                        for name in names[: max(self.sections, 2)]
+                    ]
+                }
+            )
+        return "## " + " ".join(random.choices(WORDS, k=self.section_tokens))
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _message(self, messages: List[BaseMessage], content: str, tools: Optional[list]) -> AIMessage:
+        usage = self._usage(messages, content)
+        if not tools:
+            return AIMessage(content=content, usage_metadata=usage)
+        # Structured stages get their reply as arguments of the forced tool call.
+        name = tools[0]["function"]["name"]
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": json.loads(content), "id": f"call_{self.calls}"}],
+            usage_metadata=usage,
+        )
+
+    def _usage(self, messages: List[BaseMessage], content: str) -> dict:
+        prompt = sum(len(str(message.content).split()) for message in messages)
+        completion = len(content.split())
+        return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+    def _first_token_delay(self) -> float:
+        self.calls += 1
+        return self.latency + random.uniform(0, self.jitter)
+
+    def _maybe_fail(self) -> None:
+        if random.random() < self.failure_rate:
+            raise MockLLMError(self.failure_status)
+
+    async def _wait_first_token(self) -> None:
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._first_token_delay())
+        self._maybe_fail()
+        content = self.reply(messages)
+        time.sleep(len(content.split()) / self.tokens_per_second)
+        message = self._message(messages, content, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await self._wait_first_token()
+        content = self.reply(messages)
+        await asyncio.sleep(len(content.split()) / self.tokens_per_second)
+        message = self._message(messages, content, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        if kwargs.get("tools"):
+            # Tool calls arrive whole; only free-text replies are streamed token by token.
+            result = await self._agenerate(messages, stop, run_manager, **kwargs)
+            message = result.generations[0].message
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "id": call["id"],
+                            "args": json.dumps(call["args"]),
+                            "index": index,
+                        }
+                        for index, call in enumerate(message.tool_calls)
+                    ],
+                    usage_metadata=message.usage_metadata,
+                )
+            )
+            return
+        await self._wait_first_token()
+        content = self.reply(messages)
+        words = content.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            token = word if index == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, content))
+        )
+
+
+class MockSearch:
+    """
+    Stands in for AsyncTavilyClient: ``results`` sources of ``source_words`` words
+    each, returned after ``latency`` seconds (plus up to ``jitter``).
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.3,
+        jitter: float = 0.1,
+        results: int = 5,
+        source_words: int = 400,
+        failure_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.results = results
+        self.source_words = source_words
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    async def search(self, query: str, **params) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Simulated search failure.")
+        slug = re.sub(r"\W+", "-", query.lower()).strip("-")
+        return {
+            "results": [
+                {
+                    "title": f"{query} ({index})",
+                    "url": f"https://example{index}.com/{slug}",
+                    "content": " ".join(random.choices(WORDS, k=self.source_words)),
+                    "score": round(random.uniform(0.3, 0.95), 3),
+                    "raw_content": None,
+                }
+                for index in range(self.results)
+            ],
+            "images": [f"https://placehold.co/600x400/png?{index}" for index in range(self.results)],
+        }
+
+
+@contextmanager
+def mocked_backends(llm: MockChatModel, search: MockSearch):
+    """
+    Routes every model and search client the graph builds to the given stand-ins.
+
+    Must be entered before the supervisor is built: the curator and the shared
+    chat model are built on first use through ``build_chat_model``.
+    """
+    from backend import mr_supervisour
+    from backend.graph_components import llm as llm_module
+    from backend.people import mr_curator, mr_search
+
+    with ExitStack() as stack:
+        for cached in (llm_module.get_llm, llm_module.get_deployment_llm):
+            cached.cache_clear()
+            stack.callback(cached.cache_clear)
+        for module in (llm_module, mr_curator):
+            stack.enter_context(mock.patch.object(module, "build_chat_model", lambda **_: llm))
+        # The supervisor imports tavily_client by name to warm it up.
+        for module in (mr_search, mr_supervisour):
+            stack.enter_context(mock.patch.object(module, "tavily_client", lambda: search))
+        yield
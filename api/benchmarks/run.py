@@ -0,0 +1,222 @@
+"""
+Benchmarks the blog pipeline offline, against a mock LLM and a mock search backend.
+
+Run from the api directory:
+
+    python -m benchmarks.run --mode graph --concurrency 1,8,32 --sections 4,8
+    python -m benchmarks.run --mode http --requests 50 --output results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.15
+
+``graph`` drives MrSupervisor directly; ``http`` drives POST /Generateblog-v1
+through the ASGI app, lifespan included. Every scenario (one concurrency and
+section count) reports throughput, p50/p95/p99 latency, errors and peak memory.
+With ``--baseline``, the run exits with status 1 when any scenario's throughput
+drops, or its p95 latency grows, by more than ``--tolerance``.
+
+Response caches, checkpoints and the blog store are off unless their environment
+variables are set; any other setting (LLM_MAX_CONCURRENCY, SCHEDULING_MODE, ...) is
+read from the environment as usual.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+os.environ.setdefault("SEARCH_CACHE_TTL", "0")
+os.environ.setdefault("CHECKPOINT_PATH", "")
+os.environ.setdefault("BLOG_STORE_PATH", "")
+# The mocks stand in for both services, but the clients still check their settings.
+for name, value in {
+    "AZURE_OPENAI_DEPLOYMENT": "benchmark",
+    "AZURE_API_VERSION": "2024-06-01",
+    "AZURE_OPENAI_API_KEY": "benchmark",
+    "AZURE_OPENAI_ENDPOINT": "https://benchmark.invalid",
+    "TAVILY_API_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(name, value)
+
+from .mocks import MockChatModel, MockSearch, mocked_backends
+
+
+def percentile(values: List[float], q: float) -> float:
+    """The nearest-rank ``q``-th percentile of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def drive(run_one: Callable[[str], Awaitable[None]], requests: int, concurrency: int) -> dict:
+    """Runs ``requests`` calls of ``run_one`` with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def timed(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await run_one(f"Benchmark blog {index} {uuid.uuid4().hex[:8]}")
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 3),
+        "p50": round(percentile(latencies, 50), 4),
+        "p95": round(percentile(latencies, 95), 4),
+        "p99": round(percentile(latencies, 99), 4),
+    }
+
+
+async def bench_graph(requests: int, concurrency: int) -> dict:
+    from backend.graph_components.state import BlogState
+    from backend.mr_supervisour import MrSupervisor
+
+    supervisor = MrSupervisor()
+
+    async def run_one(title: str):
+        await supervisor.arun(BlogState(title=title, finalized_sections=[]))
+
+    return await drive(run_one, requests, concurrency)
+
+
+async def bench_http(requests: int, concurrency: int) -> dict:
+    import httpx
+    import server
+
+    async with server.lifespan(server.app):
+        await server.app.state.warmup
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+            async def run_one(title: str):
+                response = await client.post(
+                    "/Generateblog-v1", json={"title": title, "finalized_sections": []}
+                )
+                response.raise_for_status()
+
+            return await drive(run_one, requests, concurrency)
+
+
+BENCHMARKS = {"graph": bench_graph, "http": bench_http}
+
+
+def scenario_key(mode: str, concurrency: int, sections: int) -> str:
+    return f"{mode}/c{concurrency}/s{sections}"
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Returns a line per scenario whose throughput or p95 regressed beyond ``tolerance``."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {before['throughput']} -> {result['throughput']} req/s")
+        if result["p95"] > before["p95"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {before['p95']} -> {result['p95']} s")
+    return regressions
+
+
+def parse_ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the blog pipeline.")
+    parser.add_argument("--mode", choices=[*BENCHMARKS, "all"], default="graph")
+    parser.add_argument("--concurrency", type=parse_ints, default=[1, 8, 32])
+    parser.add_argument("--sections", type=parse_ints, default=[4])
+    parser.add_argument("--requests", type=int, default=None, help="Per scenario; defaults to 4x concurrency (at least 8).")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-failure-status", type=int, default=500)
+    parser.add_argument("--section-tokens", type=int, default=300)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--trace-memory", action="store_true", help="Also report tracemalloc peaks (slower).")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="A previous --output file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    llm = MockChatModel(
+        latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        failure_rate=args.llm_failure_rate,
+        failure_status=args.llm_failure_status,
+        section_tokens=args.section_tokens,
+    )
+    search = MockSearch(
+        latency=args.search_latency,
+        results=args.search_results,
+        failure_rate=args.search_failure_rate,
+    )
+    modes = list(BENCHMARKS) if args.mode == "all" else [args.mode]
+    results: Dict[str, dict] = {}
+
+    print(f"{'scenario':<20}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}{'rss MB':>9}")
+    with mocked_backends(llm, search):
+        for mode in modes:
+            for sections in args.sections:
+                for concurrency in args.concurrency:
+                    llm.sections = sections
+                    requests = args.requests or max(4 * concurrency, 8)
+                    if args.trace_memory:
+                        tracemalloc.start()
+                    result = asyncio.run(BENCHMARKS[mode](requests, concurrency))
+                    if args.trace_memory:
+                        result["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                        tracemalloc.stop()
+                    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+                    key = scenario_key(mode, concurrency, sections)
+                    results[key] = result
+                    print(
+                        f"{key:<20}{result['throughput']:>9}{result['p50']:>9}{result['p95']:>9}"
+                        f"{result['p99']:>9}{result['errors']:>8}{result['peak_rss_mb']:>9}"
+                    )
+                    if result["first_error"]:
+                        print(f"  first error: {result['first_error']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,152 @@
-from fastapi import FastAPI, HTTPException
-from backend.graph_components.state import BlogState
-from backend.mr_supervisour import MrSupervisor
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from dotenv import load_dotenv
+
+# Before the backend imports: several modules read their settings at import time.
+load_dotenv()
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from backend.graph_components.state import BlogState, RegenerateRequest, Section
+from backend.graph_components.http_clients import http_clients
+from backend.graph_components.metrics import (
+    REGISTRY,
+    blog_duration,
+    record_cache_stats,
+    startup_duration,
+    track_request,
+)
+from backend.blog_store import build_blog_store
+from backend.coalescing import build_coalescer, request_key
+from backend.graph_components.markdown import iter_markdown, slim_result
+from backend.jobs import BatchRequest, JobInProgress, JobLedger, JobStore, checkpoint_path
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Seconds this module may take to import before a warning is logged. langgraph,
+# langchain and the openai SDK are imported during warm-up instead, so a worker
+# can bind its port and answer /healthz quickly.
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", 1.0))
+# Seconds between two sweeps of expired runs.
+RUN_EXPIRY_INTERVAL = float(os.environ.get("RUN_EXPIRY_INTERVAL", 60 * 60))
+
+
+def _import_graph() -> None:
+    import backend.mr_supervisour  # noqa: F401
+    import langgraph.checkpoint.sqlite.aio  # noqa: F401
+
+
+async def expire_runs(supervisor, max_age: float) -> None:
+    """Deletes the checkpoints and ledger rows of old runs every RUN_EXPIRY_INTERVAL seconds."""
+    while True:
+        try:
+            expired = await supervisor.aexpire(max_age)
+            if expired:
+                logger.info("Deleted %d runs older than %s seconds.", expired, max_age)
+        except Exception:
+            logger.exception("Expiring old runs failed.")
+        await asyncio.sleep(RUN_EXPIRY_INTERVAL)
+
+
+async def warm_up(app: FastAPI, stack: AsyncExitStack) -> None:
+    """
+    Compiles the graph, builds the agents and their clients, then resumes
+    interrupted runs. Every request shares what is built here.
+    """
+    started = time.perf_counter()
+    # The heavy imports run in a worker thread so the event loop keeps serving meanwhile.
+    await asyncio.to_thread(_import_graph)
+    from backend.mr_supervisour import MrSupervisor, checkpoint_serializer
+    from backend.graph_components.artifacts import artifacts
+    from backend.graph_components.cache import SQLITE_TIMEOUT
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    import aiosqlite
+
+    checkpointer, ledger = None, None
+    path = checkpoint_path()
+    # Runs are kept as long as their artifacts: a run can be resumed or regenerated
+    # until then, after which its checkpoints, ledger row and artifacts are deleted.
+    run_ttl = float(os.environ.get("ARTIFACT_TTL", 7 * 24 * 60 * 60))
+    if path:
+        # The ledger and the artifact store write to the same file, so the checkpointer
+        # waits for their locks like they wait for its own.
+        conn = await stack.enter_async_context(aiosqlite.connect(path, timeout=SQLITE_TIMEOUT))
+        checkpointer = AsyncSqliteSaver(conn, serde=checkpoint_serializer())
+        ledger = JobLedger(path)
+        # Checkpoints refer to run artifacts by ID, so they are kept in the same file.
+        artifacts.open(
+            path,
+            ttl=run_ttl,
+            max_entries=int(os.environ.get("ARTIFACT_DISK_SIZE", 10_000)),
+        )
+        stack.callback(artifacts.flush)
+    supervisor = MrSupervisor(checkpointer=checkpointer, ledger=ledger, store=build_blog_store())
+    await asyncio.to_thread(supervisor.warm_up)
+    from backend.graph_components.llm_cache import get_response_cache
+
+    # Cache writes are queued and flushed in the background; write what is left on shutdown.
+    for cache in (supervisor.search_agent.cache, get_response_cache().cache):
+        if cache is not None and cache.disk is not None:
+            stack.callback(cache.disk.flush)
+    app.state.supervisor = supervisor
+    app.state.jobs = JobStore(supervisor)
+    if ledger is not None:
+        expiry = asyncio.create_task(expire_runs(supervisor, run_ttl))
+        stack.callback(expiry.cancel)
+    if ledger is not None and os.environ.get("RESUME_INTERRUPTED_JOBS", "").lower() in ("1", "true"):
+        # Runs still marked "running" were cut off by a previous process; pick them
+        # up where they stopped. Each run is taken over atomically, so workers that
+        # start together never resume the same one twice. A worker started while
+        # others are serving would also take over their live runs, so enable this
+        # only when every worker of the database restarts together.
+        for job in ledger.list("running", limit=1000):
+            app.state.resumed.append(
+                asyncio.create_task(
+                    supervisor.aresume(job["thread_id"], interrupted_owner=job["owner"] or "")
+                )
+            )
+    app.state.startup["warm_up"] = round(time.perf_counter() - started, 3)
+    startup_duration.set(app.state.startup["warm_up"], phase="warm_up")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: the port opens right away and /ready reports
+    # when the worker can take traffic.
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(http_clients.aclose)
+        app.state.resumed = []
+        app.state.coalescer = build_coalescer()
+        app.state.startup = {"import": import_seconds}
+        app.state.warmup = asyncio.create_task(warm_up(app, stack))
+        stack.callback(app.state.warmup.cancel)
+        yield
 
-app = FastAPI()
+
+async def services(http_request: Request):
+    """
+    Returns the app state once warm-up has finished.
+
+    Requests that arrive while the worker is still warming up wait for it; a failed
+    warm-up answers 503.
+    """
+    try:
+        await asyncio.shield(http_request.app.state.warmup)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Server failed to start: {e}")
+    return http_request.app.state
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Use specific domains in production
@@ -14,19 +156,260 @@ app.add_middleware(
 )
 
 @app.post("/Generateblog-v1")
-async def generate_blog(request: BlogState):
-    try:
-        supervisor = MrSupervisor()
-        resulting_blog_state = supervisor.run(request) 
-        finalized_blog_content = resulting_blog_state.get("finalized_blog") 
-        print(finalized_blog_content)
+async def generate_blog(
+    request: BlogState, http_request: Request, timings: bool = False, slim: bool = False
+):
+    """
+    Generates a blog and returns its final state, or with ``slim`` only the
+    finalized blog, its identifiers and the section outline.
+    """
+    state = await services(http_request)
+    supervisor = state.supervisor
+
+    async def generate():
+        started = time.perf_counter()
+        thread_id = uuid.uuid4().hex
+        try:
+            with track_request() as request_timings:
+                resulting_blog_state = await supervisor.arun(request, thread_id=thread_id) 
+        except Exception as e:
+            blog_duration.observe(time.perf_counter() - started, status="error")
+            # The thread ID lets the client resume the run via /jobs/{thread_id}/resume.
+            raise HTTPException(
+                status_code=500, detail=str(e), headers={"X-Thread-Id": thread_id}
+            )
+        blog_duration.observe(time.perf_counter() - started, status="ok")
+        logger.debug("Finished blog %s:\n%s", thread_id, resulting_blog_state.get("finalized_blog"))
+        if timings:
+            resulting_blog_state["timings"] = request_timings.as_dict()
         return resulting_blog_state 
+
+    if timings:
+        # Timings describe a single run, so these requests never share one.
+        result = await generate()
+    else:
+        # Identical requests in flight attach to one run and all get its result (or error).
+        result = await state.coalescer.run(request_key(request), generate)
+    return slim_result(result) if slim else result
+
+
+@app.post("/Generateblog-v1/stream")
+async def generate_blog_stream(request: BlogState, http_request: Request):
+    """
+    Streams generation progress as newline-delimited JSON events.
+
+    Identical requests in flight share one run; a client that joins late first
+    receives every event sent so far.
+    """
+    state = await services(http_request)
+
+    async def events():
+        try:
+            async for event in state.coalescer.stream(
+                request_key(request), lambda: state.supervisor.astream(request)
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    
+@app.post("/Generateblog-v1/batch", status_code=202)
+async def generate_blog_batch(request: BatchRequest, http_request: Request):
+    """Queues a batch of blogs and returns the job ID to poll."""
+    job = (await services(http_request)).jobs.submit(request)
+    return {"job_id": job.id, "items": len(job.items)}
+
+
+@app.get("/Generateblog-v1/batch/{job_id}")
+async def get_blog_batch(job_id: str, http_request: Request):
+    job = (await services(http_request)).jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return job.summary()
+
+
+@app.get("/Generateblog-v1/batch/{job_id}/items/{index}")
+async def get_blog_batch_item(job_id: str, index: int, http_request: Request):
+    job = (await services(http_request)).jobs.get(job_id)
+    if job is None or not 0 <= index < len(job.items):
+        raise HTTPException(status_code=404, detail="Unknown job or item.")
+    item = job.items[index]
+    if item.status == "failed":
+        raise HTTPException(status_code=500, detail=item.error)
+    if item.status != "done":
+        raise HTTPException(status_code=409, detail=f"Item is {item.status}.")
+    return item.result
+
+
+@app.post("/Generateblog-v1/regenerate")
+async def regenerate_section(request: RegenerateRequest, http_request: Request):
+    """Rewrites a single section of a generated blog and recompiles it."""
+    if (request.blog is None) == (request.job_id is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of blog or job_id.")
+    supervisor = (await services(http_request)).supervisor
+    try:
+        return await supervisor.aregenerate(
+            request.section,
+            blog=request.blog,
+            thread_id=request.job_id,
+            refresh_dependents=request.refresh_dependents,
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown job or section: {e}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
+
+@app.get("/jobs")
+async def list_jobs(http_request: Request, status: str = None, limit: int = 50):
+    ledger = (await services(http_request)).supervisor.ledger
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="Checkpointing is disabled.")
+    return ledger.list(status, limit)
+
+
+@app.get("/jobs/{thread_id}")
+async def get_job(thread_id: str, http_request: Request):
+    supervisor = (await services(http_request)).supervisor
+    if supervisor.ledger is None:
+        raise HTTPException(status_code=404, detail="Checkpointing is disabled.")
+    job = supervisor.ledger.get(thread_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    snapshot = await supervisor.chain.aget_state(supervisor.thread_config(thread_id))
+    job["next"] = list(snapshot.next)
+    job["finalized_sections"] = [
+        section.name for section in snapshot.values.get("finalized_sections", [])
+    ]
+    return job
+
+
+@app.post("/jobs/{thread_id}/resume")
+async def resume_job(thread_id: str, http_request: Request):
+    """Resumes a failed or interrupted run from its last completed node."""
+    supervisor = (await services(http_request)).supervisor
+    try:
+        return await supervisor.aresume(thread_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    except JobInProgress as e:
+        # Another request or worker is running this checkpoint thread right now.
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/blogs")
+async def list_blogs(http_request: Request, title: str = None, limit: int = 50, offset: int = 0):
+    """Lists stored blogs, most recently updated first; pass ``next_offset`` back to page."""
+    store = (await services(http_request)).supervisor.store
+    if store is None:
+        raise HTTPException(status_code=404, detail="The blog store is disabled.")
+    limit = max(1, min(limit, 200))
+    items = store.list(title, limit, offset)
+    return {
+        "items": items,
+        "next_offset": offset + limit if len(items) == limit else None,
+    }
+
+
+@app.get("/blogs/{blog_id}")
+async def get_blog(blog_id: str, http_request: Request):
+    """
+    Returns a stored blog's final state with an ETag; a matching If-None-Match
+    answers 304 without reading the blog.
+    """
+    store = (await services(http_request)).supervisor.store
+    if store is None:
+        raise HTTPException(status_code=404, detail="The blog store is disabled.")
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match:
+        etag = store.etag(blog_id)
+        if etag is not None and f'"{etag}"' in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+    row = store.get(blog_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Unknown blog.")
+    # The state is stored as JSON already, so it is sent as is.
+    return Response(
+        content=row["state"],
+        media_type="application/json",
+        headers={"ETag": f'"{row["etag"]}"', "Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/blogs/{blog_id}/markdown")
+async def get_blog_markdown(blog_id: str, http_request: Request):
+    """Streams a stored blog's final markdown, one section per chunk."""
+    store = (await services(http_request)).supervisor.store
+    if store is None:
+        raise HTTPException(status_code=404, detail="The blog store is disabled.")
+    row = store.get(blog_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Unknown blog.")
+    sections = [Section.model_validate(section) for section in json.loads(row["state"])["sections"]]
+    return StreamingResponse(
+        iter_markdown(sections),
+        media_type="text/markdown",
+        headers={"ETag": f'"{row["etag"]}"'},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(http_request: Request):
+    """Exposes latency histograms, token counters and cache statistics for Prometheus."""
+    record_cache_stats("generation", http_request.app.state.coalescer.stats)
+    supervisor = getattr(http_request.app.state, "supervisor", None)
+    if supervisor is not None:
+        from backend.graph_components.llm_cache import get_response_cache
+
+        if supervisor.search_agent.cache is not None:
+            record_cache_stats("search", supervisor.search_agent.cache.stats)
+        llm_cache = get_response_cache().cache
+        if llm_cache is not None:
+            record_cache_stats("llm", llm_cache.stats)
+    return REGISTRY.render()
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving, whether or not warm-up has finished."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready(http_request: Request):
+    """Readiness: 200 once the graph is compiled and its clients are built, 503 until then."""
+    warmup = http_request.app.state.warmup
+    if not warmup.done():
+        return JSONResponse({"status": "starting"}, status_code=503)
+    if warmup.exception() is not None:
+        return JSONResponse(
+            {"status": "failed", "detail": str(warmup.exception())}, status_code=503
+        )
+    return {"status": "ready", "startup_seconds": http_request.app.state.startup}
+
+
 @app.get("/hello")
 async def hello():
     return {"message": "Hello World"}
 
+import_seconds = round(time.perf_counter() - _import_started, 3)
+startup_duration.set(import_seconds, phase="import")
+if import_seconds > IMPORT_TIME_BUDGET:
+    logger.warning(
+        "Importing the server took %.2fs, over the %.2fs budget (IMPORT_TIME_BUDGET).",
+        import_seconds,
+        IMPORT_TIME_BUDGET,
+    )
+
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("server:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,6 @@
+import os
+
+# Keep every cache and store the modules build at import time in memory, so the
+# tests neither read nor leave files in the temp directory.
+for name in ("SEARCH_CACHE_PATH", "LLM_CACHE_PATH", "BLOG_STORE_PATH", "CHECKPOINT_PATH"):
+    os.environ.setdefault(name, "")
@@ -0,0 +1,102 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from backend.graph_components.artifacts import ArtifactStore
+
+
+def rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+
+
+def test_released_artifacts_are_read_back_from_disk(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    store = ArtifactStore(recent_entries=0)
+    store.open(path)
+    ref = store.put("run", ["passage"])
+    store.release("run")
+
+    restarted = ArtifactStore()
+    restarted.open(path)
+    assert restarted.get(ref) == ["passage"]
+
+
+def test_puts_on_the_event_loop_are_written_in_one_batch(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    store = ArtifactStore()
+    store.open(path)
+
+    async def run():
+        refs = [store.put("run", [index]) for index in range(5)]
+        # Queued rows are readable before the worker thread writes them.
+        assert [store.get(ref) for ref in refs] == [[index] for index in range(5)]
+        return refs
+
+    refs = asyncio.run(run())
+    store.flush()
+    assert rows(path) == len(refs)
+
+
+def test_the_table_keeps_the_most_recently_stored_rows(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    store = ArtifactStore(recent_entries=0)
+    store.open(path, max_entries=2)
+    refs = [store.put("run", [index]) for index in range(3)]
+    store.release("run")
+
+    assert rows(path) == 2
+    with pytest.raises(KeyError):
+        store.get(refs[0])
+    assert store.get(refs[2]) == [2]
+
+
+def test_expired_rows_are_pruned(tmp_path, monkeypatch):
+    path = str(tmp_path / "runs.sqlite")
+    store = ArtifactStore(recent_entries=0)
+    store.open(path, ttl=60)
+    old = store.put("run", ["old"])
+    monkeypatch.setattr("time.time", lambda: 10**12)
+    store.put("run", ["new"])
+    store.release("run")
+
+    assert rows(path) == 1
+    with pytest.raises(KeyError):
+        store.get(old)
+
+
+def test_tables_written_without_expiry_are_migrated(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE artifacts (id TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("INSERT INTO artifacts VALUES ('aref', '[1]')")
+
+    store = ArtifactStore()
+    store.open(path, ttl=60)
+    store.put("run", [2])
+    assert store.get("aref") == [1]
+
+
+def test_a_failed_write_stays_queued_until_it_succeeds(tmp_path, caplog):
+    path = str(tmp_path / "runs.sqlite")
+    store = ArtifactStore(recent_entries=0)
+    store.open(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("ALTER TABLE artifacts RENAME TO moved")
+    ref = store.put("run", ["passage"])
+    store.release("run")
+    assert "stay queued" in caplog.text
+    assert store.get(ref) == ["passage"]
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("ALTER TABLE moved RENAME TO artifacts")
+    store.flush()
+    assert rows(path) == 1
+
+
+def test_the_shared_file_uses_wal(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    ArtifactStore().open(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
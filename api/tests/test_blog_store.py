@@ -0,0 +1,60 @@
+import time
+
+from backend.blog_store import BlogStore, blog_id
+
+
+def final_state(title="Python asyncio in practice", urls=("https://a.example", "https://b.example"), blog="# Blog"):
+    return {
+        "title": title,
+        "finalized_sections": [],
+        "sources": [{"url": url, "content": "text"} for url in urls],
+        "finalized_blog": blog,
+        "thread_id": "t1",
+        "sources_ref": "artifact-1",
+    }
+
+
+def test_blog_id_addresses_the_content():
+    key = blog_id("Python  Asyncio in practice", "outline", ["https://b", "https://a", "https://a"])
+    assert key == blog_id("python asyncio in practice", "outline", ["https://a", "https://b"])
+    assert key != blog_id("python asyncio in practice", "other outline", ["https://a", "https://b"])
+    assert key != blog_id("python asyncio in practice", "outline", ["https://a"])
+    assert len(key) == 32
+
+
+def test_the_same_blog_replaces_the_stored_one(tmp_path):
+    store = BlogStore(str(tmp_path / "blogs.sqlite"))
+    first = store.put(final_state(), "outline")
+    again = store.put(final_state(), "outline")
+    reordered = store.put(final_state(urls=("https://b.example", "https://a.example")), "outline")
+    rewritten = store.put(final_state(blog="# Rewritten"), "outline")
+
+    assert first == again and reordered["id"] == first["id"]
+    assert rewritten["id"] == first["id"] and rewritten["etag"] != first["etag"]
+    assert store.etag(first["id"]) == rewritten["etag"]
+    assert len(store.list()) == 1
+    assert '"# Rewritten"' in store.get(first["id"])["state"]
+
+
+def test_run_fields_are_not_stored(tmp_path):
+    store = BlogStore(str(tmp_path / "blogs.sqlite"))
+    stored = store.get(store.put(final_state(), "outline")["id"])
+    assert stored["thread_id"] == "t1"
+    assert "sources_ref" not in stored["state"] and "thread_id" not in stored["state"]
+
+
+def test_unknown_blogs(tmp_path):
+    store = BlogStore(str(tmp_path / "blogs.sqlite"))
+    assert (store.get("missing"), store.etag("missing")) == (None, None)
+
+
+def test_list_pages_most_recent_first(tmp_path):
+    store = BlogStore(str(tmp_path / "blogs.sqlite"))
+    keys = []
+    for index in range(5):
+        keys.append(store.put(final_state(title=f"Blog {index}"), "outline")["id"])
+        time.sleep(0.002)
+
+    pages = [[row["id"] for row in store.list(limit=2, offset=offset)] for offset in (0, 2, 4)]
+    assert pages == [keys[:2:-1], keys[2:0:-1], keys[:1]]
+    assert [row["id"] for row in store.list(title="BLOG 3")] == [keys[3]]
@@ -0,0 +1,110 @@
+import asyncio
+import sqlite3
+
+from backend.graph_components.cache import LRUCache, SQLiteCache, TieredCache
+
+
+def test_the_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_expired_entries_are_not_served(monkeypatch):
+    cache = LRUCache(ttl=60)
+    cache.set("a", 1)
+    monkeypatch.setattr("time.time", lambda: 10**12)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_rows_expire(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=60)
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+    monkeypatch.setattr("time.time", lambda: 10**12)
+    assert cache.get("a") is None
+
+
+def test_sqlite_prunes_the_least_recently_read_rows(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=2, prune_interval=0)
+    cache.set("a", 1)
+    now[0] += 1
+    cache.set("b", 2)
+    now[0] += 1
+    assert cache.get("a") == 1
+    now[0] += 1
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_sqlite_reads_do_not_write_until_a_batch_is_full(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.time", lambda: now[0])
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path, touch_batch=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    def used_at():
+        with sqlite3.connect(path) as conn:
+            return dict(conn.execute("SELECT key, used_at FROM cache"))
+
+    now[0] += 1
+    cache.get("a")
+    assert used_at() == {"a": 1000, "b": 1000}
+    cache.get("b")
+    assert used_at() == {"a": 1001, "b": 1001}
+
+
+def test_sqlite_prunes_at_most_once_per_interval(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path, max_entries=1, prune_interval=3600)
+    for key in "abc":
+        cache.set(key, 1)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 3
+
+
+def test_sqlite_writes_on_the_event_loop_are_batched(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path)
+
+    async def scenario():
+        for key in "abc":
+            cache.set(key, key)
+        # Queued entries are served before the worker thread writes them.
+        return [cache.get(key) for key in "abc"]
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+    cache.flush()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 3
+
+
+def test_a_failed_sqlite_write_stays_queued(tmp_path, caplog):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("ALTER TABLE cache RENAME TO moved")
+    cache.set("a", 1)
+    assert "stay queued" in caplog.text
+    assert cache.get("a") == 1
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("ALTER TABLE moved RENAME TO cache")
+    cache.flush()
+    assert SQLiteCache(path).get("a") == 1
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    disk.set("a", 1)
+    cache = TieredCache(LRUCache(), disk)
+    assert [cache.get("a"), cache.get("a"), cache.get("b")] == [1, 1, None]
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 1, "misses": 1}
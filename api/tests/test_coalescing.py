@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from backend.coalescing import Coalescer, request_key
+from backend.graph_components.state import BlogState
+
+
+def test_request_key_normalizes_the_title():
+    assert request_key(BlogState(title="Python  Asyncio", finalized_sections=[])) == request_key(
+        BlogState(title="python asyncio", finalized_sections=[])
+    )
+    assert request_key(BlogState(title="a", finalized_sections=[])) != request_key(
+        BlogState(title="a", finalized_sections=[]), {"configurable": {"curated_sources": 3}}
+    )
+
+
+def test_identical_requests_share_one_run():
+    async def scenario():
+        coalescer, runs = Coalescer(), []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return {"finalized_blog": "blog"}
+
+        results = await asyncio.gather(*(coalescer.run("key", work) for _ in range(3)))
+        return results, runs, coalescer.stats
+
+    results, runs, stats = asyncio.run(scenario())
+    assert results == [{"finalized_blog": "blog"}] * 3
+    assert results[0] is not results[1]
+    assert len(runs) == 1
+    assert stats == {"started": 1, "joined": 2, "reused": 0}
+
+
+def test_cancelled_leader_does_not_fail_joined_requests():
+    async def scenario():
+        coalescer = Coalescer()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return {"finalized_blog": "blog"}
+
+        leader = asyncio.create_task(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.run("key", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == {"finalized_blog": "blog"}
+
+
+def test_recent_results_are_reused_within_the_window():
+    async def scenario():
+        coalescer, runs = Coalescer(window=60), []
+
+        async def work():
+            runs.append(1)
+            return {"finalized_blog": "blog"}
+
+        await coalescer.run("key", work)
+        await coalescer.run("key", work)
+        return runs, coalescer.stats["reused"]
+
+    assert asyncio.run(scenario()) == ([1], 1)
+
+
+def test_late_stream_subscribers_get_every_event():
+    async def scenario():
+        coalescer, release = Coalescer(), asyncio.Event()
+
+        async def events():
+            yield {"event": "node", "node": "search"}
+            await release.wait()
+            yield {"event": "done"}
+
+        async def collect():
+            return [event async for event in coalescer.stream("key", events)]
+
+        first = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)
+        release.set()
+        return await first, await second, coalescer.stats
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == second == [{"event": "node", "node": "search"}, {"event": "done"}]
+    assert stats["started"] == 1 and stats["joined"] == 1
+
+
+def test_stream_is_cancelled_when_its_last_subscriber_leaves():
+    async def scenario():
+        coalescer, cancelled = Coalescer(), asyncio.Event()
+
+        async def events():
+            try:
+                yield {"event": "node", "node": "search"}
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def read_one():
+            async for event in coalescer.stream("key", events):
+                return event
+
+        await read_one()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return coalescer.streams
+
+    assert asyncio.run(scenario()) == {}
@@ -0,0 +1,30 @@
+import pytest
+
+from backend.graph_components.configuration import Configuration, parse_node_map
+
+
+def test_environment_overrides_the_run_configuration(monkeypatch):
+    monkeypatch.setenv("CURATED_SOURCES", "5")
+    configurable = Configuration.from_runnable_config({"configurable": {"curated_sources": 3}})
+    assert configurable.curated_sources == 5
+
+
+def test_a_call_level_cache_mode_wins_over_the_environment(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "replay")
+    assert Configuration.from_runnable_config().llm_cache_mode == "replay"
+    configurable = Configuration.from_runnable_config({"configurable": {"llm_cache_mode": "refresh"}})
+    assert configurable.llm_cache_mode == "refresh"
+
+
+def test_unknown_scheduling_modes_are_rejected():
+    with pytest.raises(ValueError):
+        Configuration.from_runnable_config({"configurable": {"scheduling_mode": "eager"}})
+
+
+def test_parse_node_map():
+    assert parse_node_map(" plan=gpt-4o, curate = mini ,", "llm_routes") == {
+        "plan": "gpt-4o",
+        "curate": "mini",
+    }
+    with pytest.raises(ValueError):
+        parse_node_map("plan", "llm_routes")
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.graph_components import http_clients as module
+from backend.graph_components.http_clients import HTTPClients, RetryTransport, backoff
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """The backoff delays slept for, without sleeping."""
+    slept = []
+
+    async def sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(module.asyncio, "sleep", sleep)
+    return slept
+
+
+def send(replies, retries=2, cap=8.0):
+    """Sends one request through a RetryTransport whose upstream answers ``replies`` in turn."""
+    replies = list(replies)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    async def scenario():
+        transport = RetryTransport(httpx.MockTransport(handler), retries, base=0.5, cap=cap)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://api.example.com/")
+
+    return asyncio.run(scenario()), len(calls)
+
+
+def test_retryable_statuses_are_retried_with_backoff(delays):
+    response, calls = send([httpx.Response(503), httpx.Response(429), httpx.Response(200)])
+    assert (response.status_code, calls) == (200, 3)
+    assert len(delays) == 2 and 0 <= delays[0] <= 0.5 and 0 <= delays[1] <= 1.0
+
+
+def test_retry_after_sets_the_delay_up_to_the_cap(delays):
+    send([httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200)])
+    send([httpx.Response(429, headers={"Retry-After": "60"}), httpx.Response(200)], cap=5)
+    assert delays == [3.0, 5.0]
+
+
+def test_the_last_retryable_response_is_returned(delays):
+    response, calls = send([httpx.Response(500)] * 3)
+    assert (response.status_code, calls) == (500, 3)
+
+
+def test_other_statuses_are_not_retried(delays):
+    response, calls = send([httpx.Response(400), httpx.Response(200)])
+    assert (response.status_code, calls, delays) == (400, 1, [])
+
+
+def test_connection_failures_are_retried_then_raised(delays):
+    failure = httpx.ConnectError("refused")
+    response, calls = send([failure, httpx.Response(200)])
+    assert (response.status_code, calls) == (200, 2)
+    with pytest.raises(httpx.ConnectError):
+        send([failure] * 3)
+
+
+def test_backoff_grows_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(module.random, "uniform", lambda low, high: high)
+    assert [backoff(attempt, 0.5, 3) for attempt in range(4)] == [0.5, 1.0, 2.0, 3]
+
+
+def test_clients_of_one_service_share_a_pool():
+    async def scenario():
+        clients = HTTPClients(http2=False)
+        first, again = clients.async_client("tavily", retry=True), clients.async_client("tavily")
+        other = clients.async_client("azure")
+        await clients.aclose()
+        return first is again, first is other, first.is_closed
+
+    assert asyncio.run(scenario()) == (True, False, True)
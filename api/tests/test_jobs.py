@@ -0,0 +1,68 @@
+import sqlite3
+
+from backend.jobs import JobLedger
+
+
+def test_a_running_job_cannot_be_started_again(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite"))
+    assert ledger.start("thread", "Title")
+    assert not ledger.start("thread", "Title")
+    assert ledger.get("thread")["attempts"] == 1
+
+
+def test_a_failed_job_can_be_started_again(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite"))
+    ledger.start("thread", "Title")
+    ledger.fail("thread", "boom")
+    assert ledger.start("thread", "Title")
+    job = ledger.get("thread")
+    assert (job["status"], job["error"], job["attempts"]) == ("running", None, 2)
+
+
+def test_two_ledgers_on_one_database_claim_a_run_once(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    first, second = JobLedger(path), JobLedger(path)
+    first.start("thread", "Title")
+    first.fail("thread", "boom")
+    assert [first.start("thread", "Title"), second.start("thread", "Title")] == [True, False]
+    assert first.get("thread")["owner"] == first.owner
+
+
+def test_only_one_worker_takes_over_an_interrupted_run(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    crashed = JobLedger(path)
+    crashed.start("thread", "Title")
+    workers = [JobLedger(path), JobLedger(path)]
+    assert [worker.take_over("thread", crashed.owner) for worker in workers] == [True, False]
+    assert workers[0].get("thread")["owner"] == workers[0].owner
+
+
+def test_ledgers_written_without_owners_are_migrated(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE jobs (
+            thread_id TEXT PRIMARY KEY, title TEXT NOT NULL, status TEXT NOT NULL,
+            error TEXT, attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL, updated_at REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("INSERT INTO jobs VALUES ('thread', 'Title', 'running', NULL, 1, 0, 0)")
+    conn.commit()
+    ledger = JobLedger(path)
+    assert ledger.take_over("thread", "")
+
+
+def test_only_stopped_runs_expire(tmp_path):
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite"))
+    for thread_id in ("done", "failed", "running", "recent"):
+        ledger.start(thread_id, "Title")
+    ledger.finish("done")
+    ledger.fail("failed", "boom")
+    ledger._conn.execute("UPDATE jobs SET updated_at = 0 WHERE thread_id != 'recent'")
+    ledger._conn.commit()
+    ledger.finish("recent")
+    assert sorted(ledger.expire(before=1)) == ["done", "failed"]
+    assert sorted(job["thread_id"] for job in ledger.list()) == ["recent", "running"]
@@ -0,0 +1,59 @@
+import asyncio
+
+from backend.graph_components.limiter import LLMLimiter
+
+
+def test_waiting_calls_are_served_by_node_priority():
+    async def run():
+        limiter = LLMLimiter(max_concurrency=1)
+        order = []
+
+        async def call(node):
+            async with limiter.slot(node):
+                order.append(node)
+
+        async with limiter.slot("plan"):
+            tasks = [
+                asyncio.create_task(call(node))
+                for node in ("search", "curate", "write_main", "plan", "write_not_main")
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["write_not_main", "write_main", "plan", "curate", "search"]
+
+
+def test_a_cancelled_waiter_does_not_leak_its_slot():
+    async def run():
+        limiter = LLMLimiter(max_concurrency=1)
+
+        async def call():
+            async with limiter.slot("plan"):
+                pass
+
+        async with limiter.slot("plan"):
+            waiter = asyncio.create_task(call())
+            await asyncio.sleep(0)
+            waiter.cancel()
+        async with limiter.slot("plan"):
+            return limiter._in_flight
+
+    assert asyncio.run(run()) == 1
+
+
+def test_a_rate_limit_pauses_new_calls():
+    async def run():
+        limiter = LLMLimiter(cooldown=0.1)
+        error = Exception("rate limited")
+        error.status_code = 429
+        try:
+            async with limiter.slot("plan"):
+                raise error
+        except Exception:
+            pass
+        started = asyncio.get_running_loop().time()
+        async with limiter.slot("plan"):
+            return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(run()) >= 0.09
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from backend.graph_components.cache import LRUCache, TieredCache
+from backend.graph_components.configuration import Configuration
+from backend.graph_components.llm_cache import LLMCacheMiss, LLMResponseCache
+from benchmarks.mocks import MockChatModel
+
+
+def ask(cache, llm, node="plan", **configurable):
+    return asyncio.run(cache.ainvoke(llm, "Write a section.", node, Configuration(**configurable)))
+
+
+@pytest.fixture
+def llm():
+    return MockChatModel(latency=0, jitter=0, tokens_per_second=10**9, section_tokens=5)
+
+
+@pytest.fixture
+def cache():
+    return LLMResponseCache(TieredCache(LRUCache()))
+
+
+def test_read_write_serves_repeated_prompts_from_the_cache(cache, llm):
+    first = ask(cache, llm)
+    assert ask(cache, llm).content == first.content
+    assert llm.calls == 1
+
+
+def test_replay_only_answers_from_the_cache(cache, llm):
+    with pytest.raises(LLMCacheMiss):
+        ask(cache, llm, llm_cache_mode="replay")
+    stored = ask(cache, llm)
+    assert ask(cache, llm, llm_cache_mode="replay").content == stored.content
+    assert llm.calls == 1
+
+
+def test_refresh_calls_the_model_and_overwrites_the_entry(cache, llm):
+    ask(cache, llm)
+    refreshed = ask(cache, llm, llm_cache_mode="refresh")
+    assert llm.calls == 2
+    assert ask(cache, llm).content == refreshed.content
+    assert llm.calls == 2
+
+
+def test_off_and_skipped_nodes_always_call_the_model(cache, llm):
+    ask(cache, llm, llm_cache_mode="off")
+    ask(cache, llm, llm_cache_mode="off")
+    ask(cache, llm, node="write_main", llm_cache_skip_nodes="curate, write_main")
+    ask(cache, llm, node="write_main", llm_cache_skip_nodes="curate, write_main")
+    assert llm.calls == 4
+    assert len(cache.cache.memory) == 0
+
+
+def test_an_unknown_mode_is_rejected(cache, llm):
+    with pytest.raises(ValueError):
+        ask(cache, llm, llm_cache_mode="sometimes")
@@ -0,0 +1,28 @@
+from backend.graph_components.markdown import MarkdownRenderer, iter_markdown, slim_result
+from backend.graph_components.state import Section
+
+
+def section(name, content=""):
+    return Section(name=name, description="", image="", content=content, isMainBody=True, id=name)
+
+
+def test_sections_are_rendered_in_plan_order_as_they_finish():
+    planned = [section("a"), section("b"), section("c")]
+    renderer = MarkdownRenderer(planned)
+    written = [section("b", "B"), section("a", "A"), section("c", "C")]
+    assert [renderer.add(s) for s in written] == ["", "A\n\nB", "\n\nC"]
+    assert "".join(iter_markdown(written[1::-1] + written[2:])) == "A\n\nB\n\nC"
+
+
+def test_empty_sections_are_skipped():
+    renderer = MarkdownRenderer([section("a"), section("b")])
+    assert [renderer.add(section("a")), renderer.add(section("b", "B"))] == ["", "B"]
+
+
+def test_slim_results_keep_the_blog_and_the_outline():
+    result = {"title": "T", "finalized_blog": "B", "sources": [1], "sections": [section("a", "A")]}
+    assert slim_result(result) == {
+        "title": "T",
+        "finalized_blog": "B",
+        "sections": [{"id": "a", "name": "a", "isMainBody": True}],
+    }
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+import pytest
+import tiktoken
+
+from backend.graph_components import prompt_builder
+from backend.graph_components.prompts import mainBodySectionWriterTemplate
+
+
+@pytest.fixture
+def unloaded(monkeypatch):
+    """A tokenizer that has not been loaded yet and fails to download."""
+    monkeypatch.setattr(prompt_builder, "_tokenizer", None)
+    monkeypatch.setattr(prompt_builder, "_tokenizer_tried_at", None)
+
+    def offline(name):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", offline)
+    return monkeypatch
+
+
+def test_the_writer_is_shown_the_image_url_to_embed():
+    prompt = mainBodySectionWriterTemplate.format(
+        title="T", sectionName="S", sectionDescription="D", imageUrl="https://img/1.png", sources=""
+    )
+    assert "![Alt text](https://img/1.png)" in prompt
+    assert "{imageUrl}" not in mainBodySectionWriterTemplate.prefix
+
+
+def test_a_failed_tokenizer_load_is_logged_and_retried(unloaded, caplog):
+    with caplog.at_level(logging.WARNING):
+        assert prompt_builder.load_encoding() is None
+    assert "offline" in caplog.text
+    assert prompt_builder._encoding() is None
+    assert prompt_builder.count_tokens("one two three") == prompt_builder.approx_tokens("one two three")
+
+    encoding = object()
+    unloaded.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    unloaded.setattr(prompt_builder, "TOKENIZER_RETRY_SECONDS", 0.0)
+    assert prompt_builder._encoding() is encoding
+
+
+def test_the_event_loop_never_loads_the_tokenizer_itself(unloaded):
+    async def count():
+        tokens = prompt_builder.count_tokens("one two three")
+        await asyncio.sleep(0.05)
+        return tokens
+
+    assert asyncio.run(count()) == prompt_builder.approx_tokens("one two three")
+    assert prompt_builder._tokenizer_tried_at is not None
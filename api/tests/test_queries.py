@@ -0,0 +1,22 @@
+from backend.graph_components.queries import keywords, query_variants
+
+
+def test_keywords_drop_stopwords_and_keep_acronyms_and_versions():
+    assert keywords("An Introduction to AI in Python 3.12 and the Python ecosystem") == [
+        "introduction",
+        "ai",
+        "python",
+        "3.12",
+        "ecosystem",
+    ]
+
+
+def test_variants_start_with_the_title_and_are_distinct():
+    variants = query_variants("Asyncio vs Threads: Concurrency in Python", 10)
+    assert variants[0] == "Asyncio vs Threads: Concurrency in Python"
+    assert "asyncio" in variants and "threads" in variants
+    assert len({variant.lower() for variant in variants}) == len(variants)
+
+
+def test_at_least_one_variant_is_returned():
+    assert query_variants("Rust", 0) == ["Rust"]
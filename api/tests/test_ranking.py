@@ -0,0 +1,29 @@
+from backend.graph_components.ranking import bm25_scores, domain_weight, rank_sources
+
+
+def test_domain_weights_match_the_longest_suffix():
+    assert domain_weight("https://www.nih.gov/health") == 0.2
+    assert domain_weight("https://data.census.gov") == 0.15
+    assert domain_weight("https://en.m.wikipedia.org/wiki/Python") == 0.1
+    assert domain_weight("https://notwikipedia.org") == 0.0
+
+
+def test_bm25_prefers_documents_about_the_query():
+    scores = bm25_scores("python asyncio", [["python", "asyncio", "loop"], ["rust", "tokio", "loop"]])
+    assert scores[0] > scores[1] == 0
+
+
+def source(url, content, score=0.5):
+    return {"url": url, "title": "", "content": content, "score": score}
+
+
+def test_relevant_sources_rank_first_and_duplicates_are_dropped():
+    text = "python asyncio event loop coroutine scheduling explained with examples"
+    sources = [
+        source("https://a.example/cooking", "bread flour water salt yeast oven baking"),
+        source("https://b.example/asyncio", text),
+        source("https://b.example/asyncio", "another page under the same url"),
+        source("https://c.example/copy", text),
+    ]
+    ranked = [s["url"] for _, s in rank_sources("Python asyncio", sources)]
+    assert ranked == ["https://b.example/asyncio", "https://a.example/cooking"]
@@ -0,0 +1,34 @@
+from backend.graph_components.retrieval import HashingEmbedder, PassageIndex, retrieve_passages
+
+
+def passage(id, text):
+    return {"id": id, "title": "", "url": f"https://example.com/{id}", "text": text}
+
+
+PASSAGES = [
+    passage("p0", "Baking sourdough bread needs flour, water, salt and a starter."),
+    passage("p1", "Python asyncio schedules coroutines on a single-threaded event loop."),
+    passage("p2", "The rust async ecosystem builds on futures polled by an executor."),
+    passage("p3", "Rust async code runs on the tokio runtime; the borrow checker enforces lifetimes."),
+]
+
+
+def test_passages_come_back_most_similar_first():
+    found = retrieve_passages(PASSAGES, "rust async tokio runtime borrow checker lifetimes", 2)
+    assert [p["id"] for p in found] == ["p3", "p2"]
+
+
+def test_every_passage_is_ranked_when_k_covers_them_all():
+    found = retrieve_passages(PASSAGES, "python asyncio event loop", 10)
+    assert found[0]["id"] == "p1"
+    assert sorted(p["id"] for p in found) == ["p0", "p1", "p2", "p3"]
+
+
+def test_equally_similar_passages_keep_their_order():
+    same = [passage(f"p{index}", "identical text") for index in range(4)]
+    found = PassageIndex(same, HashingEmbedder()).search("identical text", 3)
+    assert [p["id"] for p in found] == ["p0", "p1", "p2"]
+
+
+def test_nothing_is_retrieved_from_no_passages():
+    assert retrieve_passages([], "anything", 3) == []
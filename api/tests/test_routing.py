@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from backend.graph_components import routing
+from backend.graph_components.configuration import Configuration
+from backend.graph_components.limiter import LLMLimiter
+from backend.graph_components.routing import ModelRouter
+from benchmarks.mocks import MockChatModel, MockLLMError
+
+
+class Deployment(MockChatModel):
+    deployment_name: str = "primary"
+    latency: float = 0
+    jitter: float = 0
+    tokens_per_second: float = 10**9
+    section_tokens: int = 3
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch):
+    # A 429 pauses the shared limiter; each test gets its own without a cooldown.
+    monkeypatch.setattr(routing, "llm_limiter", LLMLimiter(cooldown=0))
+
+
+@pytest.fixture
+def fallback(monkeypatch):
+    model = Deployment(deployment_name="fallback")
+    monkeypatch.setattr(routing, "get_deployment_llm", lambda deployment: model)
+    return model
+
+
+def ask(llm, fallback="fallback", **configurable):
+    configurable = Configuration(llm_fallback_deployment=fallback, **configurable)
+    call = ModelRouter().ainvoke(llm, ["Write a section."], "write_main", configurable)
+    return asyncio.run(asyncio.wait_for(call, timeout=2))
+
+
+def test_a_rate_limited_call_falls_back(fallback):
+    primary = Deployment(failure_rate=1, failure_status=429)
+    ask(primary)
+    assert (primary.calls, fallback.calls) == (1, 1)
+
+
+def test_a_timed_out_call_falls_back(fallback):
+    primary = Deployment(latency=5)
+    ask(primary, llm_timeout=0.05)
+    assert (primary.calls, fallback.calls) == (1, 1)
+
+
+def test_other_errors_do_not_fall_back(fallback):
+    primary = Deployment(failure_rate=1, failure_status=500)
+    with pytest.raises(MockLLMError):
+        ask(primary)
+    assert fallback.calls == 0
+
+
+def test_a_slow_call_is_hedged_and_the_first_answer_wins(fallback):
+    primary = Deployment(latency=5)
+    assert ask(primary, llm_hedge_after=0.05).content.startswith("## ")
+    assert (primary.calls, fallback.calls) == (1, 1)
+
+
+def test_without_a_fallback_the_error_is_raised():
+    primary = Deployment(failure_rate=1, failure_status=429)
+    with pytest.raises(MockLLMError):
+        ask(primary, fallback="")
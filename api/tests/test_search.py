@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from backend.graph_components.cache import LRUCache, TieredCache
+from backend.people.mr_search import MrSearch
+
+
+class StubSearchClient:
+    """Answers every query with one source per query, after ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.02, scores=None, failing=()):
+        self.latency = latency
+        self.scores = scores or {}
+        self.failing = set(failing)
+        self.queries = []
+
+    async def search(self, query, **params):
+        self.queries.append(query)
+        await asyncio.sleep(self.latency if not callable(self.latency) else self.latency(query))
+        if query in self.failing:
+            raise RuntimeError(f"search failed: {query}")
+        return {
+            "results": [
+                {
+                    "url": f"https://example.com/{query.replace(' ', '-')}",
+                    "title": query,
+                    "content": f"About {query}.",
+                    "score": self.scores.get(query, 0.9),
+                }
+            ],
+            "images": [f"https://example.com/{query.replace(' ', '-')}.png"],
+        }
+
+
+def memory_cache():
+    return TieredCache(LRUCache(max_entries=16, ttl=60), None)
+
+
+def test_repeated_queries_are_served_from_the_cache():
+    client = StubSearchClient()
+    search = MrSearch(client=client, cache=memory_cache())
+
+    async def scenario():
+        await search.search("Python asyncio")
+        return await search.search("python   asyncio!")
+
+    sources, images = asyncio.run(scenario())
+    assert client.queries == ["Python asyncio"]
+    assert sources[0]["title"] == "Python asyncio"
+    assert images
+
+
+def test_cancelled_search_does_not_cancel_a_concurrent_identical_one():
+    client = StubSearchClient(latency=0.05)
+    search = MrSearch(client=client, cache=memory_cache())
+
+    async def scenario():
+        leader = asyncio.create_task(search.search("asyncio"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(search.search("asyncio"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    sources, _ = asyncio.run(scenario())
+    assert sources[0]["title"] == "asyncio"
+    assert client.queries == ["asyncio"]
+
+
+def test_search_many_stops_at_the_deadline_and_cancels_slow_queries():
+    client = StubSearchClient(latency=lambda query: 0.01 if query == "fast" else 5)
+    search = MrSearch(client=client, cache=memory_cache())
+
+    async def scenario():
+        result = await asyncio.wait_for(
+            search.search_many(["fast", "slow"], deadline=0.1, min_sources=5, min_score=0.5),
+            timeout=1,
+        )
+        await asyncio.sleep(0)
+        return result, len(search.in_flight)
+
+    (sources, _), in_flight = asyncio.run(scenario())
+    assert [source["title"] for source in sources] == ["fast"]
+    assert in_flight == 0
+
+
+def test_search_many_gives_up_when_nothing_arrives_by_the_deadline():
+    search = MrSearch(client=StubSearchClient(latency=5), cache=memory_cache())
+    with pytest.raises(TimeoutError, match="No search results"):
+        asyncio.run(
+            asyncio.wait_for(
+                search.search_many(["a", "b"], deadline=0.05, min_sources=1, min_score=0.5),
+                timeout=1,
+            )
+        )
+
+
+def test_search_many_returns_once_enough_strong_sources_arrived():
+    client = StubSearchClient(latency=lambda query: 0.01 if query != "slow" else 5)
+    search = MrSearch(client=client, cache=memory_cache())
+    sources, _ = asyncio.run(
+        asyncio.wait_for(
+            search.search_many(["a", "b", "slow"], deadline=10, min_sources=2, min_score=0.5),
+            timeout=1,
+        )
+    )
+    assert sorted(source["title"] for source in sources) == ["a", "b"]
+
+
+def test_search_many_raises_when_every_query_failed():
+    search = MrSearch(client=StubSearchClient(failing=("a", "b")), cache=memory_cache())
+    with pytest.raises(RuntimeError):
+        asyncio.run(search.search_many(["a", "b"], deadline=1, min_sources=1, min_score=0.5))
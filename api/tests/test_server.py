@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+
+import server
+from benchmarks.mocks import MockChatModel, MockSearch, mocked_backends
+
+
+def backends():
+    return mocked_backends(
+        MockChatModel(latency=0, jitter=0, tokens_per_second=10**5, sections=2, section_tokens=20),
+        MockSearch(latency=0, jitter=0, results=2, source_words=40),
+    )
+
+
+def served(scenario):
+    """Runs ``scenario(client)`` against the app inside its lifespan."""
+
+    async def run():
+        async with server.lifespan(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+
+    return asyncio.run(run())
+
+
+def test_ready_waits_for_warm_up_while_healthz_answers(monkeypatch):
+    async def warm_up(app, stack):
+        await app.state.release.wait()
+
+    monkeypatch.setattr(server, "warm_up", warm_up)
+
+    async def scenario(client):
+        server.app.state.release = release = asyncio.Event()
+        before = (await client.get("/healthz")).status_code, await client.get("/ready")
+        release.set()
+        await server.app.state.warmup
+        return before, await client.get("/ready")
+
+    (healthz, starting), ready = served(scenario)
+    assert healthz == 200
+    assert (starting.status_code, starting.json()["status"]) == (503, "starting")
+    assert (ready.status_code, ready.json()["status"]) == (200, "ready")
+
+
+def test_ready_reports_a_failed_warm_up(monkeypatch):
+    async def warm_up(app, stack):
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setattr(server, "warm_up", warm_up)
+
+    async def scenario(client):
+        await asyncio.wait([server.app.state.warmup])
+        return await client.get("/ready"), await client.get("/healthz")
+
+    ready, healthz = served(scenario)
+    assert ready.status_code == 503
+    assert ready.json() == {"status": "failed", "detail": "no credentials"}
+    assert healthz.status_code == 200
+
+
+def test_ready_after_the_real_warm_up():
+    async def scenario(client):
+        await server.app.state.warmup
+        return await client.get("/ready")
+
+    with backends():
+        ready = served(scenario)
+    assert ready.status_code == 200
+    assert "warm_up" in ready.json()["startup_seconds"]
+
+
+def test_stored_blogs_answer_conditional_requests_and_page(monkeypatch, tmp_path):
+    monkeypatch.setenv("BLOG_STORE_PATH", str(tmp_path / "blogs.sqlite"))
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+
+    async def scenario(client):
+        ids = []
+        for title in ("First blog", "Second blog", "Third blog"):
+            response = await client.post("/Generateblog-v1", json={"title": title, "finalized_sections": []})
+            ids.append(response.json()["blog_id"])
+        blog = await client.get(f"/blogs/{ids[0]}")
+        etag = blog.headers["ETag"]
+        cached = await client.get(f"/blogs/{ids[0]}", headers={"If-None-Match": f'"stale", {etag}'})
+        stale = await client.get(f"/blogs/{ids[0]}", headers={"If-None-Match": '"stale"'})
+        pages = [(await client.get("/blogs", params={"limit": 2, "offset": offset})).json() for offset in (0, 2)]
+        missing = await client.get("/blogs/unknown")
+        return ids, blog, etag, cached, stale, pages, missing
+
+    with backends():
+        ids, blog, etag, cached, stale, pages, missing = served(scenario)
+    assert blog.status_code == 200 and blog.json()["title"] == "First blog"
+    assert (cached.status_code, cached.content, cached.headers["ETag"]) == (304, b"", etag)
+    assert (stale.status_code, stale.headers["ETag"]) == (200, etag)
+    assert [item["id"] for item in pages[0]["items"] + pages[1]["items"]] == ids[::-1]
+    assert (pages[0]["next_offset"], pages[1]["next_offset"]) == (2, None)
+    assert missing.status_code == 404
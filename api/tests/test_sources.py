@@ -0,0 +1,25 @@
+from backend.graph_components.sources import CHARS_PER_TOKEN, chunk_text, prepare_sources
+
+
+def test_chunks_break_on_sentences_and_respect_the_limit():
+    text = " ".join(f"Sentence number {index} is here." for index in range(50))
+    chunks = chunk_text(text, chunk_tokens=20)
+    assert all(len(chunk) <= 20 * CHARS_PER_TOKEN for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_an_overlong_sentence_is_hard_wrapped():
+    assert [len(chunk) for chunk in chunk_text("x" * 100, chunk_tokens=10)] == [40, 40, 20]
+
+
+def test_sources_are_deduplicated_and_capped():
+    sources = [
+        {"url": "https://a", "title": "A", "content": "Short.", "raw_content": "Full   text. " * 100},
+        {"url": "https://a", "title": "A again", "content": "Other."},
+        {"url": "https://b", "title": "B", "content": "full text. " * 100},
+        {"url": "https://c", "title": "C", "content": ""},
+    ]
+    passages = prepare_sources(sources, token_budget=10)
+    assert [(p["id"], p["url"]) for p in passages] == [("p0", "https://a")]
+    assert len(passages[0]["text"]) <= 10 * CHARS_PER_TOKEN
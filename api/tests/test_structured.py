@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from backend.graph_components.state import Sections
+from backend.graph_components.structured import (
+    StructuredOutputError,
+    parse_structured,
+    repair_json,
+)
+
+
+def test_valid_json_needs_no_repair():
+    assert repair_json('{"a": [1, 2]}') == ({"a": [1, 2]}, False)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        'Here you go:\n```json\n{"a": [1, 2]}\n```',
+        "{'a': [1, 2,],} // done",
+        '{"a": [1, 2',
+        'Sure! {"a": [1, 2]} Hope this helps.',
+    ],
+)
+def test_near_misses_are_repaired(text):
+    assert repair_json(text) == ({"a": [1, 2]}, True)
+
+
+def test_a_truncated_string_is_closed():
+    assert repair_json('{"a": "unfinished') == ({"a": "unfinished"}, True)
+
+
+def test_text_without_json_is_rejected():
+    with pytest.raises(ValueError):
+        repair_json("I cannot help with that.")
+
+
+SECTION = {"name": "Intro", "description": "d", "image": "i", "content": "", "isMainBody": False}
+
+
+def test_tool_call_arguments_are_read_first():
+    response = AIMessage(
+        content="not json",
+        tool_calls=[{"name": "Sections", "args": {"sections": [SECTION]}, "id": "call"}],
+    )
+    assert parse_structured(response, Sections, "plan").sections[0].name == "Intro"
+
+
+def test_a_bare_list_is_wrapped_in_the_only_field():
+    response = AIMessage(content=json.dumps([SECTION]))
+    assert parse_structured(response, Sections, "plan").sections[0].name == "Intro"
+
+
+def test_a_reply_that_does_not_match_the_schema_is_rejected():
+    with pytest.raises(StructuredOutputError):
+        parse_structured(AIMessage(content='{"other": 1}'), Sections, "plan")
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import aiosqlite
+import pytest
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from backend.graph_components.state import BlogState, Section, SectionState
+from backend.jobs import JobInProgress, JobLedger
+from backend.mr_supervisour import MrSupervisor, checkpoint_serializer
+from benchmarks.mocks import MockChatModel, MockSearch, mocked_backends
+
+
+def blog(title="Python asyncio in practice"):
+    return BlogState(title=title, finalized_sections=[])
+
+
+def backends(latency=0.0):
+    return mocked_backends(
+        MockChatModel(latency=latency, jitter=0, tokens_per_second=10**5, sections=4, section_tokens=20),
+        MockSearch(latency=0, jitter=0, results=3, source_words=60),
+    )
+
+
+@asynccontextmanager
+async def checkpointed(path):
+    """A supervisor checkpointing to ``path``, set up as the server does."""
+    async with aiosqlite.connect(path) as conn:
+        checkpointer = AsyncSqliteSaver(conn, serde=checkpoint_serializer())
+        yield MrSupervisor(checkpointer=checkpointer, ledger=JobLedger(path))
+
+
+async def until_written(supervisor, thread_id):
+    """Waits until ``thread_id`` was checkpointed with its sections planned but not all written."""
+    while True:
+        snapshot = await supervisor.chain.aget_state(supervisor.thread_config(thread_id))
+        if snapshot.values.get("sections") and snapshot.next:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_a_cancelled_run_is_marked_failed_and_can_be_resumed(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+
+    async def scenario():
+        async with checkpointed(path) as supervisor:
+            run = asyncio.create_task(supervisor.arun(blog(), thread_id="t1"))
+            await asyncio.wait_for(until_written(supervisor, "t1"), timeout=5)
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+            cancelled = supervisor.ledger.get("t1")
+            result = await supervisor.aresume("t1")
+            return cancelled, result, supervisor.ledger.get("t1")
+
+    with backends(latency=0.05):
+        cancelled, result, job = asyncio.run(scenario())
+    assert (cancelled["status"], cancelled["error"]) == ("failed", "CancelledError")
+    assert result["finalized_blog"]
+    assert (job["status"], job["attempts"]) == ("done", 2)
+
+
+def test_old_runs_are_deleted_with_their_checkpoints(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+
+    async def scenario():
+        async with checkpointed(path) as supervisor:
+            await supervisor.arun(blog(), thread_id="old")
+            await supervisor.arun(blog("Rust async runtimes"), thread_id="new")
+            supervisor.ledger.start("running", "Still running")
+            supervisor.ledger._conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE thread_id IN ('old', 'running')", (time.time() - 100,)
+            )
+            supervisor.ledger._conn.commit()
+            expired = await supervisor.aexpire(50)
+            states = [
+                (await supervisor.chain.aget_state(supervisor.thread_config(thread_id))).values
+                for thread_id in ("old", "new")
+            ]
+            return expired, states, [job["thread_id"] for job in supervisor.ledger.list()]
+
+    with backends():
+        expired, (old, new), jobs = asyncio.run(scenario())
+    assert expired == 1
+    assert not old and new["title"] == "Rust async runtimes"
+    assert sorted(jobs) == ["new", "running"]
+
+
+def test_checkpointed_state_types_are_restored_as_themselves():
+    serializer = checkpoint_serializer()
+    section = Section(name="Intro", description="", image="", content="", isMainBody=False)
+    for value in (section, SectionState(section=section, title="Title")):
+        assert type(serializer.loads_typed(serializer.dumps_typed(value))) is type(value)
+
+
+def test_streams_progress_tokens_and_the_markdown_in_plan_order(monkeypatch):
+    # Cached completions are not streamed token by token.
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+
+    async def scenario():
+        return [event async for event in MrSupervisor().astream(blog(), thread_id="t1")]
+
+    with backends():
+        events = asyncio.run(scenario())
+    nodes = [event["node"] for event in events if event["event"] == "node"]
+    assert nodes[:3] == ["search", "curate", "prepare"]
+    assert nodes[-1] == "compile_blog"
+
+    written = {event["section"]: event["content"] for event in events if event.get("content")}
+    streamed = {}
+    for event in events:
+        if event["event"] == "token":
+            streamed[event["section"]] = streamed.get(event["section"], "") + event["delta"]
+    assert written and streamed == written
+
+    done = events[-1]
+    assert (done["event"], done["thread_id"]) == ("done", "t1")
+    markdown = "".join(event["delta"] for event in events if event["event"] == "markdown")
+    assert markdown == done["finalized_blog"]
+
+
+class ConcurrencyProbe(MockChatModel):
+    """Records the most model calls in flight at once."""
+
+    active: int = 0
+    peak: int = 0
+
+    async def _agenerate(self, *args, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super()._agenerate(*args, **kwargs)
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.parametrize("mode, peak", [("staged", 2), ("overlap", 4)])
+def test_overlap_writes_the_introduction_and_conclusion_alongside_the_main_bodies(monkeypatch, mode, peak):
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    monkeypatch.setenv("SCHEDULING_MODE", mode)
+    llm = ConcurrencyProbe(latency=0.05, jitter=0, tokens_per_second=10**5, sections=4, section_tokens=20)
+    with mocked_backends(llm, MockSearch(latency=0, jitter=0, results=3, source_words=60)):
+        result = asyncio.run(MrSupervisor().arun(blog()))
+    # Two main bodies, plus the introduction and conclusion when they overlap.
+    assert llm.peak == peak
+    assert sorted(section.name for section in result["finalized_sections"]) == [
+        "Conclusion",
+        "Introduction",
+        "Part 1",
+        "Part 2",
+    ]
+    assert all(section.content for section in result["finalized_sections"])
+
+
+def contents(result):
+    """The content of each section, the last draft winning as in the compiled blog."""
+    return {section.name: section.content for section in result["finalized_sections"]}
+
+
+@pytest.mark.parametrize(
+    "refresh, rewritten",
+    [(True, ["Part 1", "Introduction", "Conclusion"]), (False, ["Part 1"])],
+)
+def test_regenerating_a_run_rewrites_the_section_and_saves_it(monkeypatch, tmp_path, refresh, rewritten):
+    monkeypatch.setenv("SCHEDULING_MODE", "staged")
+    path = str(tmp_path / "runs.sqlite")
+
+    async def scenario():
+        async with checkpointed(path) as supervisor:
+            first = await supervisor.arun(blog(), thread_id="t1")
+            result = await supervisor.aregenerate("Part 1", thread_id="t1", refresh_dependents=refresh)
+            return first, result, await supervisor.aresume("t1"), supervisor.ledger.get("t1")
+
+    with backends():
+        first, result, saved, job = asyncio.run(scenario())
+    before, after = contents(first), contents(result)
+    assert sorted(result["regenerated_sections"]) == sorted(rewritten)
+    assert {name for name in after if after[name] != before[name]} == set(rewritten)
+    assert after["Part 1"] in result["finalized_blog"] and before["Part 1"] not in result["finalized_blog"]
+    assert saved["finalized_blog"] == result["finalized_blog"] and contents(saved) == after
+    assert job["status"] == "done"
+
+
+def test_regenerating_a_blog_sent_by_the_client():
+    async def scenario():
+        supervisor = MrSupervisor()
+        first = await supervisor.arun(blog())
+        sent = BlogState(
+            title=first["title"],
+            finalized_sections=first["finalized_sections"],
+            sources=first["sources"],
+            sections=first["sections"],
+            main_sections=first["main_sections"],
+        )
+        return first, await supervisor.aregenerate("Introduction", blog=sent)
+
+    with backends():
+        first, result = asyncio.run(scenario())
+    before, after = contents(first), contents(result)
+    assert result["regenerated_sections"] == ["Introduction"]
+    assert after["Introduction"] != before["Introduction"]
+    assert {name: after[name] for name in after if name != "Introduction"} == {
+        name: before[name] for name in before if name != "Introduction"
+    }
+    with pytest.raises(KeyError):
+        asyncio.run(MrSupervisor().aregenerate("Missing", blog=blog()))
+
+
+def test_a_running_run_is_not_regenerated(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+
+    async def scenario():
+        async with checkpointed(path) as supervisor:
+            run = asyncio.create_task(supervisor.arun(blog(), thread_id="t1"))
+            await asyncio.wait_for(until_written(supervisor, "t1"), timeout=5)
+            with pytest.raises(JobInProgress):
+                await supervisor.aregenerate("Part 1", thread_id="t1")
+            result = await run
+            return result, supervisor.ledger.get("t1")
+
+    with backends(latency=0.05):
+        result, job = asyncio.run(scenario())
+    assert result["finalized_blog"]
+    assert (job["status"], job["attempts"]) == ("done", 1)
@@ -14,8 +14,47 @@ export function BlogGenerator() {
   const [isGenerating, setIsGenerating] = useState(false);
   const [showPreview, setShowPreview] = useState(false);
   const [generatedContent, setGeneratedContent] = useState("");
+  const [progress, setProgress] = useState("");
   const { toast } = useToast();
 
+  const handleEvent = (
+    event: any,
+    order: string[],
+    drafts: Record<string, string>
+  ) => {
+    switch (event.event) {
+      case "node":
+        if (event.node === "plan") {
+          order.splice(0, order.length, ...event.sections.map((s: any) => s.name));
+          setProgress("Writing sections...");
+        } else if (event.node === "search") {
+          setProgress("Curating sources...");
+        } else if (event.node === "curate") {
+          setProgress("Planning the outline...");
+        } else if (event.section) {
+          drafts[event.section] = event.content;
+        }
+        break;
+      case "token":
+        drafts[event.section] = (drafts[event.section] || "") + event.delta;
+        break;
+      case "done":
+        setGeneratedContent(event.finalized_blog || "Blog generation failed!");
+        return;
+      case "error":
+        throw new Error(event.detail);
+    }
+    if (event.event === "token" || event.section) {
+      setGeneratedContent(
+        order
+          .filter((name) => drafts[name])
+          .map((name) => drafts[name])
+          .join("\n\n")
+      );
+      setShowPreview(true);
+    }
+  };
+
   const generateBlog = async () => {
     if (!topic.trim()) {
       toast({
@@ -27,6 +66,7 @@ export function BlogGenerator() {
     }
 
     setIsGenerating(true);
+    setProgress("Searching the web...");
     try {
       const blogState = {
         title: topic,
@@ -36,7 +76,7 @@ export function BlogGenerator() {
         sections: [],
       };
 
-      const response = await fetch("/api/Generateblog-v1", {
+      const response = await fetch("/api/Generateblog-v1/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -44,13 +84,26 @@ export function BlogGenerator() {
         body: JSON.stringify(blogState),
       });
 
-      const data = await response.json();
-
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error(`Error: ${response.status} - ${response.statusText}`);
       }
 
-      setGeneratedContent(data.finalized_blog || "Blog generation failed!");
+      // The server emits one JSON event per line; render sections as they stream in.
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const order: string[] = [];
+      const drafts: Record<string, string> = {};
+      let buffered = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split("\n");
+        buffered = lines.pop() || "";
+        for (const line of lines) {
+          if (line.trim()) handleEvent(JSON.parse(line), order, drafts);
+        }
+      }
 
       setShowPreview(true);
       toast({
@@ -68,6 +121,7 @@ export function BlogGenerator() {
       });
     } finally {
       setIsGenerating(false);
+      setProgress("");
     }
   };
 
@@ -119,7 +173,9 @@ export function BlogGenerator() {
             {isGenerating ? (
               <>
                 <Loader2 className="mr-2 h-5 w-5 animate-spin" />
-                <span className="font-sans">Crafting Your Masterpiece...</span>
+                <span className="font-sans">
+                  {progress || "Crafting Your Masterpiece..."}
+                </span>
               </>
             ) : (
               <>